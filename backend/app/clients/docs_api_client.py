@@ -1,15 +1,139 @@
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import httpx
 from app.logger import logger
 from app.config import settings
 from app.core.schemas import GetTestInnerResult
+from app.documents.schemas import IngestionJob, ChunkingParams
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_ms = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "avg_ms": self.total_ms / self.requests if self.requests else 0.0,
+        }
 
 
 class DocsApiClient:
+    """
+    Клиент docs_api с одним долгоживущим httpx.AsyncClient:
+    соединения переиспользуются между запросами (keep-alive).
+    Клиент создаётся в lifespan через start() и закрывается через aclose().
+    """
+
     def __init__(self):
         self.base_url = settings.docs_api_url
+        self.http2 = settings.DOCS_API_HTTP2
+        self._client: httpx.AsyncClient | None = None
+        self._stats: dict[str, _EndpointStats] = {}
+
+        self.default_timeout = httpx.Timeout(
+            settings.DOCS_API_DEFAULT_TIMEOUT_SECONDS,
+            connect=settings.DOCS_API_CONNECT_TIMEOUT_SECONDS,
+        )
+        self.answer_timeout = httpx.Timeout(
+            settings.DOCS_API_ANSWER_TIMEOUT_SECONDS,
+            connect=settings.DOCS_API_CONNECT_TIMEOUT_SECONDS,
+        )
+        self.test_timeout = httpx.Timeout(
+            settings.DOCS_API_TEST_TIMEOUT_SECONDS,
+            connect=settings.DOCS_API_CONNECT_TIMEOUT_SECONDS,
+        )
+
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+
+        if self.http2 and not _http2_available():
+            logger.warning("[DocsAPI] HTTP/2 включён, но пакет h2 не установлен — используется HTTP/1.1")
+            self.http2 = False
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=self.http2,
+            timeout=self.default_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.DOCS_API_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.DOCS_API_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.DOCS_API_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+        )
+        logger.info(f"[DocsAPI] HTTP-клиент создан (http2={self.http2})")
 
-    async def ingest_document(self, document_id: str, storage_key: str, original_filename: str) -> None:
-        url = f"{self.base_url}/documents/ingest"
+    async def aclose(self) -> None:
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+        logger.info("[DocsAPI] HTTP-клиент закрыт")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("DocsApiClient не запущен: вызовите start() в lifespan приложения")
+        return self._client
+
+    @asynccontextmanager
+    async def _track(self, endpoint: str):
+        stats = self._stats.setdefault(endpoint, _EndpointStats())
+        stats.requests += 1
+        stats.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.total_ms += (time.perf_counter() - started) * 1000
+
+    async def _request(self, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        async with self._track(endpoint):
+            return await self.client.request(method, url, **kwargs)
+
+    def stats(self) -> dict:
+        """Статистика пула соединений и запросов по эндпоинтам."""
+        connections = []
+        if self._client is not None:
+            # httpx не даёт публичного API для состояния пула, берём его у httpcore
+            pool = getattr(self._client._transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "started": self._client is not None,
+            "http2": self.http2,
+            "max_connections": settings.DOCS_API_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.DOCS_API_MAX_KEEPALIVE_CONNECTIONS,
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "endpoints": {name: stats.snapshot() for name, stats in self._stats.items()},
+        }
+
+    async def ingest_document(self, document_id: str, storage_key: str, original_filename: str) -> IngestionJob:
+        """Ставит документ в очередь индексации docs_api и возвращает созданную задачу."""
         payload = {
             "document_id": document_id,
             "storage_key": storage_key,
@@ -17,64 +141,130 @@ class DocsApiClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
+            response = await self._request("ingest_document", "POST", "/documents/ingest", json=payload)
+            response.raise_for_status()
+            return IngestionJob(**response.json())
         except httpx.HTTPError as e:
             logger.error(f"[DocsAPI] Ошибка при отправке документа {document_id} на индексирование: {repr(e)}")
             raise
 
-    async def delete_document(self, document_id: str) -> None:
-        url = f"{self.base_url}/documents/{document_id}"
+    async def rechunk_document(
+        self,
+        document_id: str,
+        storage_key: str,
+        original_filename: str,
+        chunking: ChunkingParams | None = None,
+    ) -> IngestionJob:
+        """Ставит в очередь docs_api перечанкивание и переиндексацию документа."""
+        payload = {
+            "document_id": document_id,
+            "storage_key": storage_key,
+            "original_filename": original_filename,
+            "chunking": chunking.model_dump() if chunking else None,
+        }
+
+        try:
+            response = await self._request("rechunk_document", "POST", "/documents/rechunk", json=payload)
+            response.raise_for_status()
+            return IngestionJob(**response.json())
+        except httpx.HTTPError as e:
+            logger.error(f"[DocsAPI] Ошибка при перечанкивании документа {document_id}: {repr(e)}")
+            raise
 
+    async def get_ingestion_job(self, job_id: str) -> IngestionJob | None:
+        """Возвращает состояние задачи индексации или None, если docs_api её не знает."""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(url)
-                response.raise_for_status()
+            response = await self._request("get_ingestion_job", "GET", f"/documents/jobs/{job_id}")
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            return IngestionJob(**response.json())
+        except httpx.HTTPError as e:
+            logger.error(f"[DocsAPI] Ошибка при получении задачи индексации {job_id}: {repr(e)}")
+            raise
+
+    async def delete_document(self, document_id: str) -> None:
+        try:
+            response = await self._request("delete_document", "DELETE", f"/documents/{document_id}")
+            response.raise_for_status()
         except httpx.HTTPError as e:
             logger.error(f"[DocsAPI] Ошибка при удалении документа {document_id}: {repr(e)}")
             raise
 
     async def get_collections(self) -> list[str]:
-        url = f"{self.base_url}/documents/collections"
-
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                data = response.json()
-                collections = data.get("collections", [])
-                logger.info(f"Получено {len(collections)} объектов из ChromaDB")
-                return collections
+            response = await self._request("get_collections", "GET", "/documents/collections")
+            response.raise_for_status()
+            data = response.json()
+            collections = data.get("collections", [])
+            logger.info(f"Получено {len(collections)} объектов из ChromaDB")
+            return collections
         except httpx.HTTPError as e:
             logger.error(f"[DocsAPI] Ошибка при получении списка коллекций: {repr(e)}")
             raise
 
     async def get_answer(self, question: str, collection_name: str) -> str:
-        url = f"{self.base_url}/get_answer"
         payload = {
             "question": question,
             "collection_name": collection_name
         }
 
         try:
-            async with httpx.AsyncClient(timeout=300) as client:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
-                return response.json()["answer"]
+            response = await self._request(
+                "get_answer", "POST", "/get_answer", json=payload, timeout=self.answer_timeout
+            )
+            response.raise_for_status()
+            return response.json()["answer"]
         except httpx.HTTPError as e:
             logger.error(f"[DocsAPI] Ошибка при получении ответа от DocsAPI: {repr(e)}")
             raise
-    
+
+    async def stream_answer(self, question: str, collection_name: str) -> AsyncIterator[str]:
+        """Проксирует SSE-поток docs_api /get_answer/stream, отдавая текстовые дельты ответа."""
+        payload = {
+            "question": question,
+            "collection_name": collection_name
+        }
+
+        try:
+            async with self._track("stream_answer"):
+                async with self.client.stream(
+                    "POST", "/get_answer/stream", json=payload, timeout=self.answer_timeout
+                ) as response:
+                    response.raise_for_status()
+
+                    event = "message"
+                    done = False
+                    async for line in response.aiter_lines():
+                        if not line:
+                            event = "message"
+                        elif line.startswith("event:"):
+                            event = line[len("event:"):].strip()
+                        elif line.startswith("data:"):
+                            data = json.loads(line[len("data:"):].strip())
+                            if event == "error":
+                                raise RuntimeError(data.get("detail", "Ошибка генерации ответа"))
+                            if event == "done":
+                                done = True
+                                break
+                            yield data["delta"]
+
+                    # Поток, оборвавшийся без done (падение docs_api, разрыв соединения), — ошибка, а не ответ
+                    if not done:
+                        raise RuntimeError("Поток ответа DocsAPI завершился без события done")
+        except httpx.HTTPError as e:
+            logger.error(f"[DocsAPI] Ошибка при потоковом получении ответа от DocsAPI: {repr(e)}")
+            raise
+
     async def get_test(self, collection_name: str) -> GetTestInnerResult:
-        url = f"{self.base_url}/get_test"
         payload = {"collection_name": collection_name}
 
         try:
-            async with httpx.AsyncClient(timeout=300) as client:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
-                return GetTestInnerResult(**response.json())
+            response = await self._request(
+                "get_test", "POST", "/get_test", json=payload, timeout=self.test_timeout
+            )
+            response.raise_for_status()
+            return GetTestInnerResult(**response.json())
         except httpx.HTTPError as e:
             logger.error(f"[DocsAPI] Ошибка при получении теста от DocsAPI: {repr(e)}")
             raise
@@ -1,5 +1,17 @@
 import io
+import time
+import asyncio
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from typing import Any, BinaryIO, Callable
+import certifi
+import urllib3
 from minio import Minio
+from minio.datatypes import Object
 from minio.error import S3Error
 from minio.deleteobjects import DeleteObject
 
@@ -7,13 +19,75 @@ from app.config import settings
 from app.logger import logger
 
 
+class FileTooLargeError(ValueError):
+    pass
+
+
+class _HashingReader:
+    """
+    Обёртка над бинарным потоком: на лету считает размер и sha256
+    и прерывает чтение, как только размер превышает max_size.
+    """
+
+    def __init__(self, stream: BinaryIO, max_size: int):
+        self._stream = stream
+        self._sha256 = hashlib.sha256()
+        self.max_size = max_size
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise FileTooLargeError(f"Размер файла превышает {self.max_size} байт")
+        self._sha256.update(data)
+        return data
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+
+def _build_http_client(pool_size: int) -> urllib3.PoolManager:
+    """
+    Пул соединений к MinIO. Размер пула совпадает с числом потоков исполнителя,
+    чтобы каждый поток получал своё соединение без ожидания и без лишних сокетов.
+    Таймауты и повторы — как у клиента minio по умолчанию.
+    """
+    return urllib3.PoolManager(
+        maxsize=pool_size,
+        timeout=urllib3.Timeout(
+            connect=settings.MINIO_CONNECT_TIMEOUT_SECONDS,
+            read=settings.MINIO_READ_TIMEOUT_SECONDS,
+        ),
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=certifi.where(),
+        retries=urllib3.Retry(
+            total=5,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+    )
+
+
 class MinioClient:
-    def __init__(self):
+    def __init__(self, pool_size: int = 10):
         self.client = Minio(
             settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ACCESS_KEY,
             secret_key=settings.MINIO_SECRET_KEY,
             secure=settings.MINIO_SECURE,
+            http_client=_build_http_client(pool_size),
+        )
+        # Клиент только для подписи presigned-ссылок: подпись включает хост,
+        # поэтому он смотрит на внешний адрес MinIO, доступный браузеру.
+        # Регион задан явно, чтобы подпись не требовала запроса к MinIO.
+        self.public_client = Minio(
+            settings.MINIO_PUBLIC_ENDPOINT or settings.MINIO_ENDPOINT,
+            access_key=settings.MINIO_ACCESS_KEY,
+            secret_key=settings.MINIO_SECRET_KEY,
+            secure=settings.MINIO_PUBLIC_SECURE if settings.MINIO_PUBLIC_ENDPOINT else settings.MINIO_SECURE,
+            region=settings.MINIO_REGION,
         )
         self.bucket_name = settings.MINIO_BUCKET_NAME
         self.root_path = settings.MINIO_ROOT_PATH.strip("/")
@@ -46,6 +120,59 @@ class MinioClient:
             logger.error(f"Ошибка загрузки {object_name} в MinIO: {e}")
             raise
 
+    def upload_stream(
+        self,
+        stream: BinaryIO,
+        object_name: str,
+        content_type: str,
+        max_size: int,
+    ) -> tuple[int, str]:
+        """
+        Загружает поток в MinIO multipart-загрузкой частями по MINIO_UPLOAD_PART_SIZE,
+        не читая файл в память целиком. Возвращает (размер, sha256).
+        При превышении max_size загрузка прерывается с FileTooLargeError.
+        """
+        object_name = self._get_object_name(object_name)
+        reader = _HashingReader(stream, max_size)
+        try:
+            self.client.put_object(
+                bucket_name=self.bucket_name,
+                object_name=object_name,
+                data=reader,
+                length=-1,
+                part_size=settings.MINIO_UPLOAD_PART_SIZE,
+                content_type=content_type
+            )
+            logger.info(f"Файл успешно загружен в MinIO: {object_name} ({reader.size} байт, sha256={reader.sha256})")
+            return reader.size, reader.sha256
+        except S3Error as e:
+            logger.error(f"Ошибка загрузки {object_name} в MinIO: {e}")
+            raise
+
+    def get_presigned_upload_url(self, object_name: str, expires_seconds: int) -> str:
+        """Возвращает presigned PUT-ссылку для прямой загрузки объекта в MinIO."""
+        object_name = self._get_object_name(object_name)
+        try:
+            return self.public_client.presigned_put_object(
+                bucket_name=self.bucket_name,
+                object_name=object_name,
+                expires=timedelta(seconds=expires_seconds),
+            )
+        except S3Error as e:
+            logger.error(f"Ошибка создания presigned-ссылки для {object_name}: {e}")
+            raise
+
+    def stat_document(self, object_name: str) -> Object | None:
+        """Возвращает метаданные объекта или None, если объекта нет."""
+        object_name = self._get_object_name(object_name)
+        try:
+            return self.client.stat_object(bucket_name=self.bucket_name, object_name=object_name)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return None
+            logger.error(f"Ошибка получения метаданных {object_name} из MinIO: {e}")
+            raise
+
     def delete_documents(self, object_names: str | list[str]) -> None:
         if isinstance(object_names, str):
             object_names = [object_names]
@@ -79,3 +206,136 @@ class MinioClient:
         except S3Error as e:
             logger.error(f"Ошибка при получении списка объектов из MinIO: {e}")
             raise
+
+    def list_objects_info(self) -> list[Object]:
+        """Список объектов под root_path с метаданными (etag, last_modified)."""
+        prefix = f"{self.root_path}/" if self.root_path else ""
+        try:
+            objects = list(self.client.list_objects(bucket_name=self.bucket_name, prefix=prefix, recursive=True))
+            logger.info(f"Получено {len(objects)} объектов из MinIO")
+            return objects
+        except S3Error as e:
+            logger.error(f"Ошибка при получении списка объектов из MinIO: {e}")
+            raise
+
+
+class _OperationStats:
+    """Счётчики и окно последних задержек одной операции MinIO."""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent_ms: deque[float] = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, failed: bool) -> None:
+        self.count += 1
+        self.errors += int(failed)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent_ms.append(elapsed_ms)
+
+    def snapshot(self) -> dict:
+        recent = sorted(self.recent_ms)
+
+        def percentile(q: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(q * len(recent)))]
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": self.max_ms,
+        }
+
+
+class AsyncMinioClient:
+    """
+    Асинхронный фасад над MinioClient. Синхронный SDK minio выполняется
+    в отдельном ограниченном пуле потоков, поэтому долгие загрузки не блокируют
+    цикл событий и не занимают общий пул потоков по умолчанию.
+    Для каждой операции собирается статистика задержек.
+    """
+
+    def __init__(self, max_workers: int, latency_window: int = 512):
+        self.max_workers = max_workers
+        self.sync_client = MinioClient(pool_size=max_workers)
+        self.root_path = self.sync_client.root_path
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="minio")
+        self._latency_window = latency_window
+        self._stats: dict[str, _OperationStats] = {}
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._in_flight -= 1
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._stats_lock:
+                stats = self._stats.setdefault(operation, _OperationStats(self._latency_window))
+                stats.record(elapsed_ms, failed)
+
+    async def upload_document(self, file_bytes: bytes, object_name: str, content_type: str) -> None:
+        await self._run("upload_document", self.sync_client.upload_document, file_bytes, object_name, content_type)
+
+    async def upload_stream(
+        self,
+        stream: BinaryIO,
+        object_name: str,
+        content_type: str,
+        max_size: int,
+    ) -> tuple[int, str]:
+        return await self._run(
+            "upload_stream",
+            self.sync_client.upload_stream,
+            stream=stream,
+            object_name=object_name,
+            content_type=content_type,
+            max_size=max_size,
+        )
+
+    async def get_presigned_upload_url(self, object_name: str, expires_seconds: int) -> str:
+        return await self._run(
+            "get_presigned_upload_url",
+            self.sync_client.get_presigned_upload_url,
+            object_name,
+            expires_seconds,
+        )
+
+    async def stat_document(self, object_name: str) -> Object | None:
+        return await self._run("stat_document", self.sync_client.stat_document, object_name)
+
+    async def delete_documents(self, object_names: str | list[str]) -> None:
+        await self._run("delete_documents", self.sync_client.delete_documents, object_names)
+
+    async def list_documents(self) -> list[str]:
+        return await self._run("list_documents", self.sync_client.list_documents)
+
+    async def list_objects_info(self) -> list[Object]:
+        return await self._run("list_objects_info", self.sync_client.list_objects_info)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            operations = {name: stats.snapshot() for name, stats in self._stats.items()}
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "operations": operations,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
@@ -30,9 +30,39 @@ class Settings(BaseSettings):
     MINIO_SECURE: bool = False
     MINIO_BUCKET_NAME: str
     MINIO_ROOT_PATH: str
+    MINIO_UPLOAD_PART_SIZE: int = 10 * 1024 * 1024
+    MINIO_PUBLIC_ENDPOINT: str | None = None
+    MINIO_PUBLIC_SECURE: bool = True
+    MINIO_REGION: str = "us-east-1"
+    MINIO_PRESIGNED_EXPIRES_SECONDS: int = 15 * 60
+    MINIO_MAX_WORKERS: int = 8
+    MINIO_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    MINIO_READ_TIMEOUT_SECONDS: float = 300.0
+
+    # Storage sync
+    STORAGE_SYNC_INTERVAL_SECONDS: int = 15 * 60
+    STORAGE_SYNC_START_DELAY_SECONDS: int = 5
+    STORAGE_SYNC_REINGEST_CONCURRENCY: int = 4
+    # Объекты и записи моложе этого окна не трогаются: загрузка может быть ещё в процессе
+    STORAGE_SYNC_GRACE_SECONDS: int = 60 * 60
+    # Незавершённая задача индексации старше этого окна считается потерянной
+    STORAGE_SYNC_STALE_JOB_SECONDS: int = 60 * 60
+
+    # Bulk upload
+    BULK_UPLOAD_MAX_FILES: int = 200
+    BULK_UPLOAD_CONCURRENCY: int = 8
+    BULK_INGEST_CONCURRENCY: int = 8
 
     # Docs API
     DOCS_API_PORT: int
+    DOCS_API_HTTP2: bool = False
+    DOCS_API_MAX_CONNECTIONS: int = 100
+    DOCS_API_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    DOCS_API_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    DOCS_API_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    DOCS_API_DEFAULT_TIMEOUT_SECONDS: float = 30.0
+    DOCS_API_ANSWER_TIMEOUT_SECONDS: float = 300.0
+    DOCS_API_TEST_TIMEOUT_SECONDS: float = 300.0
 
     @property
     def docs_api_url(self) -> str:
@@ -1,5 +1,6 @@
 import uuid
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 
 from app.auth.models import AuthUser
 from app.auth.auth_config import current_user, current_user_optional
@@ -8,7 +9,7 @@ from app.dependencies.docs_api import get_docs_api_client, DocsApiClient
 from app.core.core_repository import CoreRepository
 from app.documents.doc_repository import DocumentRepository
 from app.core.schemas import GetQARequest, GetQAResponse, GetTestResponse, GetTestRequest, CheckTestRequest, CheckTestResponse
-from app.core.services.qa_service import get_answer_for_user
+from app.core.services.qa_service import get_answer_for_user, stream_answer_for_user
 from app.core.services.test_service import get_test_for_user, check_test_answer
 
 
@@ -35,6 +36,28 @@ async def get_answer_endpoint(
     return GetQAResponse(result=answer, request_id=str(uuid.uuid4()))
 
 
+@router.post("/get_answer/stream")
+async def get_answer_stream_endpoint(
+    body: GetQARequest,
+    user: AuthUser | None = Depends(current_user_optional),
+    doc_repo: DocumentRepository = Depends(get_document_repository),
+    docs_api_client: DocsApiClient = Depends(get_docs_api_client),
+):
+    events = await stream_answer_for_user(
+        user=user,
+        filename=body.filename,
+        question=body.question,
+        doc_repo=doc_repo,
+        docs_api_client=docs_api_client,
+    )
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/get_test", response_model=GetTestResponse)
 async def get_test_endpoint(
     body: GetTestRequest,
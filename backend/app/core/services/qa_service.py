@@ -1,7 +1,12 @@
+import uuid
+from typing import AsyncIterator
+
 from app.documents.doc_repository import DocumentRepository
 from app.clients.docs_api_client import DocsApiClient
 from app.core.core_repository import CoreRepository
+from app.database import async_session_maker
 from app.auth.models import AuthUser
+from app.sse import sse_event
 from app.logger import logger
 
 
@@ -38,3 +43,51 @@ async def get_answer_for_user(
         raise RuntimeError(f"Ошибка логирования ответа")
 
     return answer
+
+
+async def stream_answer_for_user(
+    user: AuthUser | None,
+    filename: str,
+    question: str,
+    doc_repo: DocumentRepository,
+    docs_api_client: DocsApiClient,
+) -> AsyncIterator[str]:
+    """
+    Ищет документ (ошибки поднимаются до начала стрима) и возвращает
+    генератор SSE-событий. Собранный ответ логируется после завершения стрима
+    в собственной сессии: сессия запроса к этому моменту уже может быть закрыта.
+    """
+    document = await doc_repo.get_document_by_name(filename)
+    if not document:
+        raise ValueError("Документ не найден")
+
+    request_id = str(uuid.uuid4())
+
+    async def event_stream() -> AsyncIterator[str]:
+        parts: list[str] = []
+        try:
+            async for delta in docs_api_client.stream_answer(
+                question=question,
+                collection_name=str(document.id)
+            ):
+                parts.append(delta)
+                yield sse_event({"delta": delta})
+        except Exception as e:
+            logger.error(f"Ошибка потоковой генерации ответа: {e}")
+            yield sse_event({"detail": "Ошибка генерации ответа"}, event="error")
+            return
+
+        try:
+            async with async_session_maker() as session:
+                await CoreRepository(session).log_qa_interaction(
+                    user_id=user.id if user else None,
+                    document_id=document.id,
+                    question=question,
+                    answer="".join(parts),
+                )
+        except Exception as e:
+            logger.error(f"Ошибка логирования ответа: {e}")
+
+        yield sse_event({"request_id": request_id}, event="done")
+
+    return event_stream()
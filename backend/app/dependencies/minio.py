@@ -1,7 +1,8 @@
-from app.clients.minio_client import MinioClient
+from app.config import settings
+from app.clients.minio_client import AsyncMinioClient
 
 
-minio_client = MinioClient()
+minio_client = AsyncMinioClient(max_workers=settings.MINIO_MAX_WORKERS)
 
-def get_minio_client() -> MinioClient:
+def get_minio_client() -> AsyncMinioClient:
     return minio_client
@@ -0,0 +1,9 @@
+from app.documents.sync_service import StorageSync
+from app.dependencies.minio import minio_client
+from app.dependencies.docs_api import docs_api_client
+
+
+storage_sync = StorageSync(minio_client=minio_client, docs_api_client=docs_api_client)
+
+def get_storage_sync() -> StorageSync:
+    return storage_sync
@@ -1,10 +1,12 @@
 import uuid
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, select, delete, update, or_
+from sqlalchemy import insert, select, delete, update, or_, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.documents.models import documents
-from app.documents.schemas import DocumentCreateResponse, Document, DocumentShort, DocumentCreateMeta
+from app.documents.models import documents, ingestion_jobs, storage_sync_state, IngestionStatus
+from app.documents.schemas import DocumentCreateResponse, Document, DocumentShort, DocumentCreateMeta, IngestionJob
 from app.logger import logger
 
 
@@ -48,6 +50,23 @@ class DocumentRepository:
             logger.error(f"Ошибка при добавлении документа в БД: {e}")
             raise
 
+    async def add_documents(self, rows: list[dict]) -> list[DocumentCreateResponse]:
+        """Добавляет несколько документов одним многострочным INSERT в одной транзакции."""
+        if not rows:
+            return []
+
+        stmt = insert(documents).values(rows).returning(documents)
+        try:
+            result = await self.session.execute(stmt)
+            await self.session.commit()
+            created = [DocumentCreateResponse(**row._mapping) for row in result.fetchall()]
+            logger.info(f"В БД добавлено {len(created)} документов")
+            return created
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Ошибка при пакетном добавлении документов в БД: {e}")
+            raise
+
     async def delete_documents(self, doc_ids: list[uuid.UUID]) -> int:
         if not doc_ids:
             logger.warning("Список ID документов для удаления пуст")
@@ -149,6 +168,11 @@ class DocumentRepository:
         row = result.first()
         return row[0] if row else None
 
+    async def document_id_exists(self, doc_id: uuid.UUID) -> bool:
+        stmt = select(documents.c.id).where(documents.c.id == doc_id)
+        result = await self.session.execute(stmt)
+        return result.first() is not None
+
     async def document_exists(self, doc_name: str) -> bool:
         stmt = select(documents.c.id).where(documents.c.name == doc_name)
         result = await self.session.execute(stmt)
@@ -168,3 +192,121 @@ class DocumentRepository:
         except SQLAlchemyError as e:
             logger.error(f"Ошибка при проверке существования документа: {e}")
             raise
+
+    async def get_existing_names_for_user(self, user_id: uuid.UUID, names: list[str]) -> set[str]:
+        """Возвращает те имена из списка, которые уже заняты документами пользователя."""
+        if not names:
+            return set()
+
+        stmt = select(documents.c.name).where(
+            documents.c.user_id == user_id,
+            documents.c.name.in_(names),
+        )
+        try:
+            result = await self.session.execute(stmt)
+            return set(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при проверке имён документов: {e}")
+            raise
+
+    async def save_ingestion_jobs(self, jobs: list[IngestionJob]) -> None:
+        """Сохраняет несколько новых задач индексации одним INSERT."""
+        if not jobs:
+            return
+
+        stmt = pg_insert(ingestion_jobs).values([
+            dict(
+                id=job.job_id,
+                document_id=job.document_id,
+                status=job.status,
+                chunk_count=job.chunk_count,
+                timings=job.timings or None,
+                error=job.error,
+            )
+            for job in jobs
+        ]).on_conflict_do_nothing(index_elements=[ingestion_jobs.c.id])
+        try:
+            await self.session.execute(stmt)
+            await self.session.commit()
+            logger.info(f"Сохранено {len(jobs)} задач индексации")
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при сохранении задач индексации: {e}")
+            raise
+
+    async def save_ingestion_job(self, job: IngestionJob) -> None:
+        """Создаёт или обновляет запись о задаче индексации (ключ — id задачи в docs_api)."""
+        values = dict(
+            status=job.status,
+            chunk_count=job.chunk_count,
+            timings=job.timings or None,
+            error=job.error,
+        )
+        stmt = (
+            pg_insert(ingestion_jobs)
+            .values(id=job.job_id, document_id=job.document_id, **values)
+            .on_conflict_do_update(
+                index_elements=[ingestion_jobs.c.id],
+                set_={**values, "updated_at": func.now()},
+            )
+        )
+        try:
+            await self.session.execute(stmt)
+            await self.session.commit()
+            logger.info(f"Задача индексации {job.job_id} документа {job.document_id}: {job.status.value}")
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при сохранении задачи индексации {job.job_id}: {e}")
+            raise
+
+    async def get_latest_ingestion_job(self, document_id: uuid.UUID) -> dict | None:
+        stmt = (
+            select(ingestion_jobs)
+            .where(ingestion_jobs.c.document_id == document_id)
+            .order_by(ingestion_jobs.c.created_at.desc())
+            .limit(1)
+        )
+        try:
+            result = await self.session.execute(stmt)
+            return result.mappings().first()
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при получении задачи индексации документа {document_id}: {e}")
+            raise
+
+    async def get_active_ingestion_document_ids(self, updated_after: datetime) -> set[uuid.UUID]:
+        """Документы, у которых есть незавершённая задача индексации, обновлявшаяся после updated_after."""
+        stmt = select(ingestion_jobs.c.document_id).where(
+            ingestion_jobs.c.status.notin_([IngestionStatus.done, IngestionStatus.failed]),
+            ingestion_jobs.c.updated_at > updated_after,
+        ).distinct()
+        try:
+            result = await self.session.execute(stmt)
+            return set(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при получении активных задач индексации: {e}")
+            raise
+
+    async def get_sync_state(self, name: str) -> dict | None:
+        stmt = select(storage_sync_state).where(storage_sync_state.c.name == name)
+        try:
+            result = await self.session.execute(stmt)
+            row = result.mappings().first()
+            return dict(row) if row else None
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при получении состояния синхронизации: {e}")
+            raise
+
+    async def save_sync_state(self, name: str, **values) -> None:
+        """Создаёт или обновляет контрольную точку синхронизации хранилищ."""
+        stmt = (
+            pg_insert(storage_sync_state)
+            .values(name=name, **values)
+            .on_conflict_do_update(
+                index_elements=[storage_sync_state.c.name],
+                set_={**values, "updated_at": func.now()},
+            )
+        )
+        try:
+            await self.session.execute(stmt)
+            await self.session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка при сохранении состояния синхронизации: {e}")
+            raise
@@ -1,7 +1,8 @@
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from enum import Enum
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ENUM
 from sqlalchemy import (
-    Table, Column, String, DateTime, ForeignKey, Text, MetaData, BigInteger, Boolean
+    Table, Column, String, DateTime, ForeignKey, Text, MetaData, BigInteger, Boolean, Integer
 )
 from sqlalchemy.sql import func
 
@@ -24,3 +25,39 @@ documents = Table(
     Column("created_at", DateTime(timezone=True), server_default=func.now()),
     Column("added_by_admin", Boolean, nullable=False, server_default="false")
 )
+
+
+class IngestionStatus(str, Enum):
+    queued = "queued"
+    parsing = "parsing"
+    embedding = "embedding"
+    done = "done"
+    failed = "failed"
+
+
+ingestion_jobs = Table(
+    "ingestion_jobs",
+    metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True, default=uuid.uuid4),
+    Column("document_id", UUID(as_uuid=True), ForeignKey(documents.c.id, ondelete="CASCADE"), nullable=False),
+    Column("status", ENUM(IngestionStatus, name="ingestionstatus", create_type=False), nullable=False),
+    Column("chunk_count", Integer, nullable=True),
+    Column("timings", JSONB, nullable=True),
+    Column("error", Text, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now()),
+)
+
+
+storage_sync_state = Table(
+    "storage_sync_state",
+    metadata,
+    Column("name", String, primary_key=True),
+    Column("started_at", DateTime(timezone=True), nullable=True),
+    Column("finished_at", DateTime(timezone=True), nullable=True),
+    Column("last_success_at", DateTime(timezone=True), nullable=True),
+    Column("object_etags", JSONB, nullable=True),
+    Column("stats", JSONB, nullable=True),
+    Column("error", Text, nullable=True),
+    Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now()),
+)
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Query, status
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Query, status
 
-from app.clients.minio_client import MinioClient
+from app.clients.minio_client import AsyncMinioClient
 from app.documents.doc_repository import DocumentRepository
 from app.dependencies.minio import get_minio_client
 from app.dependencies.repository import get_document_repository
@@ -9,7 +9,21 @@ from app.documents.services.upload import save_document
 from app.documents.services.update import update_document
 from app.documents.services.get_docs import get_user_documents, get_all_documents
 from app.documents.services.delete import delete_document
-from app.documents.schemas import DocumentCreateResponse, DocumentUpdate, DocumentCreateMeta
+from app.documents.services.ingestion import get_ingestion_status, rechunk_document
+from app.documents.services.presigned_upload import init_presigned_upload, complete_presigned_upload
+from app.documents.services.bulk_upload import bulk_save_documents
+from app.documents.schemas import (
+    DocumentCreateResponse,
+    DocumentUpdate,
+    DocumentCreateMeta,
+    IngestionStatusResponse,
+    IngestionJob,
+    DocumentRechunkRequest,
+    BulkUploadResponse,
+    PresignedUploadRequest,
+    PresignedUploadResponse,
+    PresignedUploadComplete,
+)
 from app.auth.models import AuthUser
 from app.auth.auth_config import current_superuser, current_user
 
@@ -26,7 +40,7 @@ async def upload_document(
     file: UploadFile = File(...),
     metadata: DocumentCreateMeta = Depends(DocumentCreateMeta.as_form),
     user: AuthUser = Depends(current_superuser),
-    minio_client: MinioClient = Depends(get_minio_client),
+    minio_client: AsyncMinioClient = Depends(get_minio_client),
     repo: DocumentRepository = Depends(get_document_repository),
     docs_api_client: DocsApiClient = Depends(get_docs_api_client),
 ):
@@ -40,6 +54,69 @@ async def upload_document(
     )
 
 
+@router.post(
+    "/upload/bulk",
+    response_model=BulkUploadResponse,
+    status_code=status.HTTP_200_OK
+)
+async def bulk_upload_documents(
+    files: list[UploadFile] = File(..., description="Файлы .docx и/или zip-архивы с ними"),
+    description: str | None = Form(None),
+    user: AuthUser = Depends(current_superuser),
+    minio_client: AsyncMinioClient = Depends(get_minio_client),
+    repo: DocumentRepository = Depends(get_document_repository),
+    docs_api_client: DocsApiClient = Depends(get_docs_api_client),
+):
+    return await bulk_save_documents(
+        files=files,
+        description=description,
+        user=user,
+        minio_client=minio_client,
+        repo=repo,
+        docs_api_client=docs_api_client,
+    )
+
+
+@router.post(
+    "/upload/init",
+    response_model=PresignedUploadResponse,
+    status_code=status.HTTP_200_OK
+)
+async def init_direct_upload(
+    payload: PresignedUploadRequest,
+    user: AuthUser = Depends(current_superuser),
+    minio_client: AsyncMinioClient = Depends(get_minio_client),
+    repo: DocumentRepository = Depends(get_document_repository),
+):
+    return await init_presigned_upload(
+        payload=payload,
+        user=user,
+        minio_client=minio_client,
+        repo=repo,
+    )
+
+
+@router.post(
+    "/upload/complete",
+    response_model=DocumentCreateResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def complete_direct_upload(
+    payload: PresignedUploadComplete,
+    user: AuthUser = Depends(current_superuser),
+    minio_client: AsyncMinioClient = Depends(get_minio_client),
+    repo: DocumentRepository = Depends(get_document_repository),
+    docs_api_client: DocsApiClient = Depends(get_docs_api_client),
+):
+    return await complete_presigned_upload(
+        payload=payload,
+        user=user,
+        minio_client=minio_client,
+        repo=repo,
+        docs_api_client=docs_api_client,
+    )
+
+
 @router.get("/my", status_code=status.HTTP_200_OK)
 async def get_my_documents(
     user: AuthUser = Depends(current_user),
@@ -56,6 +133,43 @@ async def get_admin_documents(
     return await get_all_documents(repo=repo)
 
 
+@router.get(
+    "/ingestion_status",
+    response_model=IngestionStatusResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_document_ingestion_status(
+    doc_name: str = Query(..., description="Exact name of the document"),
+    user: AuthUser = Depends(current_user),
+    repo: DocumentRepository = Depends(get_document_repository),
+    docs_api_client: DocsApiClient = Depends(get_docs_api_client),
+):
+    return await get_ingestion_status(
+        doc_name=doc_name,
+        user=user,
+        repo=repo,
+        docs_api_client=docs_api_client,
+    )
+
+
+@router.post(
+    "/rechunk",
+    response_model=IngestionJob,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def rechunk_document_endpoint(
+    payload: DocumentRechunkRequest,
+    user: AuthUser = Depends(current_superuser),
+    repo: DocumentRepository = Depends(get_document_repository),
+    docs_api_client: DocsApiClient = Depends(get_docs_api_client),
+):
+    return await rechunk_document(
+        payload=payload,
+        repo=repo,
+        docs_api_client=docs_api_client,
+    )
+
+
 @router.delete(
     '/delete-my',
     status_code=status.HTTP_204_NO_CONTENT,
@@ -63,7 +177,7 @@ async def get_admin_documents(
 async def del_my_docs(
     doc_name: str = Query(..., description="Exact name of the document to delete"),
     user: AuthUser = Depends(current_user),
-    minio_client: MinioClient = Depends(get_minio_client),
+    minio_client: AsyncMinioClient = Depends(get_minio_client),
     repo: DocumentRepository = Depends(get_document_repository),
     docs_api_client: DocsApiClient = Depends(get_docs_api_client),
 ):
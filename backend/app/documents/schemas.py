@@ -1,9 +1,12 @@
 import re
 from uuid import UUID
 from datetime import datetime
+from typing import Literal
 from fastapi import Form
 from pydantic import BaseModel, Field, field_validator
 
+from app.documents.models import IngestionStatus
+
 
 def validate_filename(value: str | None) -> str | None:
     if value is None:
@@ -41,6 +44,21 @@ class DocumentCreateMeta(DocumentBase):
         return cls(name=name, description=description)
 
 
+class PresignedUploadRequest(DocumentBase):
+    filename: str = Field(..., description="Исходное имя файла")
+
+
+class PresignedUploadResponse(BaseModel):
+    upload_id: UUID
+    upload_url: str
+    expires_in: int
+
+
+class PresignedUploadComplete(DocumentBase):
+    upload_id: UUID
+    filename: str = Field(..., description="Исходное имя файла")
+
+
 class DocumentCreateResponse(BaseModel):
     id: UUID
     name: str
@@ -53,6 +71,22 @@ class DocumentCreateResponse(BaseModel):
         from_attributes = True
 
 
+class BulkUploadItemResult(BaseModel):
+    filename: str
+    name: str | None = None
+    status: Literal["created", "failed"]
+    document_id: UUID | None = None
+    ingestion_job_id: UUID | None = None
+    ingestion_status: IngestionStatus | None = None
+    error: str | None = None
+
+
+class BulkUploadResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkUploadItemResult]
+
+
 class Document(DocumentBase):
     id: UUID
     original_filename: str
@@ -80,3 +114,35 @@ class DocumentUpdate(BaseModel):
     @classmethod
     def validate_new_name(cls, v):
         return validate_filename(v)
+
+
+class IngestionJob(BaseModel):
+    job_id: UUID
+    document_id: UUID
+    status: IngestionStatus
+    chunk_count: int | None = None
+    timings: dict[str, float] = Field(default_factory=dict)
+    error: str | None = None
+
+
+class ChunkingParams(BaseModel):
+    chunking_strategy: Literal["by_title", "basic"]
+    max_characters: int = Field(..., gt=0)
+    new_after_n_chars: int = Field(..., gt=0)
+    combine_under_n_chars: int = Field(..., ge=0)
+
+
+class DocumentRechunkRequest(BaseModel):
+    doc_name: str
+    chunking: ChunkingParams | None = Field(None, description="Параметры чанкинга; по умолчанию — настройки docs_api")
+
+
+class IngestionStatusResponse(BaseModel):
+    document_name: str
+    job_id: UUID
+    status: IngestionStatus
+    chunk_count: int | None = None
+    timings: dict[str, float] | None = None
+    error: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
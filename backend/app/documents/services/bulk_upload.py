@@ -0,0 +1,253 @@
+import asyncio
+import uuid
+import zipfile
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import BinaryIO, Callable
+
+from fastapi import UploadFile, HTTPException
+
+from app.config import settings
+from app.documents.schemas import (
+    BulkUploadItemResult,
+    BulkUploadResponse,
+    IngestionJob,
+    validate_filename,
+)
+from app.documents.models import IngestionStatus
+from app.documents.doc_repository import DocumentRepository
+from app.documents.services.upload import validate_upload_filename, MAX_FILE_SIZE_BYTES
+from app.clients.minio_client import AsyncMinioClient, FileTooLargeError
+from app.clients.docs_api_client import DocsApiClient
+from app.auth.models import AuthUser
+from app.logger import logger
+
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+@dataclass
+class _BulkItem:
+    filename: str
+    open_stream: Callable[[], BinaryIO]
+    content_type: str
+    name: str | None = None
+    doc_id: uuid.UUID | None = None
+    object_name: str | None = None
+    size: int | None = None
+    error: str | None = None
+    job: IngestionJob | None = None
+
+
+def _collect_items(files: list[UploadFile], archives: list[zipfile.ZipFile]) -> list[_BulkItem]:
+    """Разворачивает zip-архивы и обычные файлы формы в единый список элементов загрузки."""
+    items: list[_BulkItem] = []
+
+    for file in files:
+        filename = file.filename or ""
+        if filename.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(file.file)
+            except zipfile.BadZipFile:
+                items.append(_BulkItem(filename=filename, open_stream=lambda: None, content_type="", error="Повреждённый zip-архив"))
+                continue
+            archives.append(archive)
+
+            for info in archive.infolist():
+                path = PurePosixPath(info.filename)
+                if info.is_dir() or path.parts[0] == "__MACOSX" or path.name.startswith("."):
+                    continue
+                items.append(_BulkItem(
+                    filename=path.name,
+                    open_stream=lambda archive=archive, info=info: archive.open(info),
+                    content_type=DOCX_CONTENT_TYPE,
+                ))
+        else:
+            def open_upload(file=file) -> BinaryIO:
+                file.file.seek(0)
+                return file.file
+
+            items.append(_BulkItem(
+                filename=filename,
+                open_stream=open_upload,
+                content_type=file.content_type or "application/octet-stream",
+            ))
+
+    return items
+
+
+def _validate_names(items: list[_BulkItem]) -> None:
+    """Проверяет расширения и имена, в том числе на повторы внутри одной загрузки."""
+    seen: set[str] = set()
+    for item in items:
+        if item.error:
+            continue
+        try:
+            validate_upload_filename(item.filename)
+            item.name = validate_filename(PurePosixPath(item.filename).stem)
+        except HTTPException as e:
+            item.error = e.detail
+            continue
+        except ValueError as e:
+            item.error = str(e)
+            continue
+
+        if item.name in seen:
+            item.error = "Документ с таким именем встречается в загрузке несколько раз"
+        seen.add(item.name)
+
+
+async def _upload_item(
+    item: _BulkItem,
+    minio_client: AsyncMinioClient,
+    semaphore: asyncio.Semaphore,
+) -> None:
+    item.doc_id = uuid.uuid4()
+    file_type = item.filename.split(".")[-1].lower()
+    object_name = f"{item.doc_id}.{file_type}"
+
+    async with semaphore:
+        try:
+            item.size, _ = await minio_client.upload_stream(
+                stream=item.open_stream(),
+                object_name=object_name,
+                content_type=item.content_type,
+                max_size=MAX_FILE_SIZE_BYTES,
+            )
+        except FileTooLargeError:
+            item.error = "Размер файла превышает 100MB"
+            return
+        except Exception as e:
+            logger.error(f"Ошибка загрузки файла {item.filename} в MinIO: {repr(e)}")
+            item.error = "Ошибка при сохранении в MinIO"
+            return
+
+    item.object_name = object_name
+    if item.size == 0:
+        item.error = "Файл пустой"
+
+
+async def _ingest_item(
+    item: _BulkItem,
+    docs_api_client: DocsApiClient,
+    semaphore: asyncio.Semaphore,
+) -> None:
+    async with semaphore:
+        try:
+            item.job = await docs_api_client.ingest_document(
+                document_id=str(item.doc_id),
+                storage_key=item.object_name,
+                original_filename=item.filename,
+            )
+        except Exception as e:
+            logger.error(f"Ошибка при вызове docs_api для документа {item.doc_id}: {repr(e)}")
+            item.job = IngestionJob(
+                job_id=uuid.uuid4(),
+                document_id=item.doc_id,
+                status=IngestionStatus.failed,
+                error="Не удалось поставить документ в очередь индексации",
+            )
+
+
+async def _cleanup_objects(items: list[_BulkItem], minio_client: AsyncMinioClient) -> None:
+    object_names = [item.object_name for item in items if item.object_name]
+    if not object_names:
+        return
+    try:
+        await minio_client.delete_documents(object_names)
+    except Exception as e:
+        logger.critical(f"Ошибка при удалении из MinIO после сбоя: {repr(e)}")
+
+
+async def bulk_save_documents(
+    files: list[UploadFile],
+    description: str | None,
+    user: AuthUser,
+    minio_client: AsyncMinioClient,
+    repo: DocumentRepository,
+    docs_api_client: DocsApiClient,
+) -> BulkUploadResponse:
+    """
+    Пакетная загрузка документов (отдельные файлы и/или zip-архивы):
+    имена проверяются одним запросом, файлы грузятся в MinIO параллельно,
+    записи документов добавляются одним INSERT, индексация запускается
+    с ограниченной параллельностью. Ошибка одного файла не прерывает остальные.
+    """
+    archives: list[zipfile.ZipFile] = []
+    try:
+        items = _collect_items(files, archives)
+        if not items:
+            raise HTTPException(status_code=400, detail="Файлы не загружены")
+        if len(items) > settings.BULK_UPLOAD_MAX_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Слишком много файлов: максимум {settings.BULK_UPLOAD_MAX_FILES} за одну загрузку",
+            )
+        logger.info(f"Пакетная загрузка пользователем {user.id}: {len(items)} файлов")
+
+        _validate_names(items)
+
+        candidates = [item for item in items if not item.error]
+        existing = await repo.get_existing_names_for_user(user.id, [item.name for item in candidates])
+        for item in candidates:
+            if item.name in existing:
+                item.error = "Документ с таким именем уже существует"
+
+        upload_semaphore = asyncio.Semaphore(settings.BULK_UPLOAD_CONCURRENCY)
+        await asyncio.gather(*(
+            _upload_item(item, minio_client, upload_semaphore)
+            for item in items if not item.error
+        ))
+    finally:
+        for archive in archives:
+            archive.close()
+
+    # Пустые файлы уже лежат в MinIO — удаляем их
+    await _cleanup_objects([item for item in items if item.error and item.object_name], minio_client)
+
+    uploaded = [item for item in items if not item.error]
+    rows = [
+        dict(
+            id=item.doc_id,
+            name=item.name,
+            original_filename=item.filename,
+            description=description,
+            type=item.filename.split(".")[-1].lower(),
+            size=item.size,
+            user_id=user.id,
+            storage_key=item.object_name,
+            added_by_admin=user.is_superuser,
+        )
+        for item in uploaded
+    ]
+    try:
+        await repo.add_documents(rows)
+    except Exception:
+        await _cleanup_objects(uploaded, minio_client)
+        for item in uploaded:
+            item.error = "Ошибка при сохранении документа"
+        uploaded = []
+
+    ingest_semaphore = asyncio.Semaphore(settings.BULK_INGEST_CONCURRENCY)
+    await asyncio.gather(*(_ingest_item(item, docs_api_client, ingest_semaphore) for item in uploaded))
+    try:
+        await repo.save_ingestion_jobs([item.job for item in uploaded])
+    except Exception as e:
+        logger.error(f"Ошибка при сохранении задач индексации пакетной загрузки: {repr(e)}")
+
+    results = [
+        BulkUploadItemResult(
+            filename=item.filename,
+            name=item.name,
+            status="failed" if item.error else "created",
+            document_id=None if item.error else item.doc_id,
+            ingestion_job_id=item.job.job_id if item.job else None,
+            ingestion_status=item.job.status if item.job else None,
+            error=item.error,
+        )
+        for item in items
+    ]
+    created = sum(1 for result in results if result.status == "created")
+    logger.info(f"Пакетная загрузка завершена: создано {created}, ошибок {len(results) - created}")
+
+    return BulkUploadResponse(created=created, failed=len(results) - created, results=results)
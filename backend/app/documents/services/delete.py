@@ -2,7 +2,7 @@ from fastapi import HTTPException, status
 
 from app.auth.models import AuthUser
 from app.documents.doc_repository import DocumentRepository
-from app.clients.minio_client import MinioClient
+from app.clients.minio_client import AsyncMinioClient
 from app.clients.docs_api_client import DocsApiClient
 
 
@@ -10,7 +10,7 @@ async def delete_document(
     doc_name: str,
     user: AuthUser,
     repo: DocumentRepository,
-    minio_client: MinioClient,
+    minio_client: AsyncMinioClient,
     docs_api_client: DocsApiClient
 ):
     if not await repo.document_exists(doc_name):
@@ -28,7 +28,7 @@ async def delete_document(
         doc_id = str(document.id)
 
         # Удаляем объект из MinIO
-        minio_client.delete_documents(storage_key)
+        await minio_client.delete_documents(storage_key)
 
         # Удаляем из ChromaDB
         await docs_api_client.delete_document(doc_id)
@@ -0,0 +1,88 @@
+from fastapi import HTTPException
+
+from app.auth.models import AuthUser
+from app.documents.doc_repository import DocumentRepository
+from app.documents.models import IngestionStatus
+from app.documents.schemas import IngestionJob, IngestionStatusResponse, DocumentRechunkRequest
+from app.clients.docs_api_client import DocsApiClient
+from app.logger import logger
+
+
+TERMINAL_STATUSES = {IngestionStatus.done, IngestionStatus.failed}
+
+
+async def get_ingestion_status(
+    doc_name: str,
+    user: AuthUser,
+    repo: DocumentRepository,
+    docs_api_client: DocsApiClient,
+) -> IngestionStatusResponse:
+    """
+    Возвращает состояние последней задачи индексации документа.
+    Незавершённая задача обновляется из docs_api и сохраняется в БД.
+    """
+    try:
+        document = await repo.get_document_by_name(doc_name)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Документ не найден")
+
+    if not user.is_superuser and document.user_id != user.id:
+        raise HTTPException(status_code=403, detail="Нет доступа к документу")
+
+    row = await repo.get_latest_ingestion_job(document.id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Индексация документа не запускалась")
+
+    if row["status"] not in TERMINAL_STATUSES:
+        try:
+            job = await docs_api_client.get_ingestion_job(str(row["id"]))
+        except Exception as e:
+            logger.error(f"Не удалось обновить статус индексации {row['id']}: {repr(e)}")
+        else:
+            if job is None:
+                # docs_api хранит задачи в памяти и мог быть перезапущен
+                job = IngestionJob(
+                    job_id=row["id"],
+                    document_id=document.id,
+                    status=IngestionStatus.failed,
+                    error="Задача индексации не найдена в docs_api",
+                )
+            await repo.save_ingestion_job(job)
+            row = await repo.get_latest_ingestion_job(document.id)
+
+    return IngestionStatusResponse(
+        document_name=document.name,
+        job_id=row["id"],
+        status=row["status"],
+        chunk_count=row["chunk_count"],
+        timings=row["timings"],
+        error=row["error"],
+        created_at=row["created_at"],
+        updated_at=row["updated_at"],
+    )
+
+
+async def rechunk_document(
+    payload: DocumentRechunkRequest,
+    repo: DocumentRepository,
+    docs_api_client: DocsApiClient,
+) -> IngestionJob:
+    """Запускает перечанкивание и переиндексацию документа в docs_api без повторного парсинга."""
+    try:
+        document = await repo.get_document_by_name(payload.doc_name)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Документ не найден")
+
+    try:
+        job = await docs_api_client.rechunk_document(
+            document_id=str(document.id),
+            storage_key=document.storage_key,
+            original_filename=document.original_filename,
+            chunking=payload.chunking,
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при запуске перечанкивания документа {document.id}: {repr(e)}")
+        raise HTTPException(status_code=502, detail="Не удалось запустить переиндексацию документа")
+
+    await repo.save_ingestion_job(job)
+    return job
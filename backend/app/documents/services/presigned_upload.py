@@ -0,0 +1,119 @@
+import uuid
+from fastapi import HTTPException
+
+from app.config import settings
+from app.documents.schemas import (
+    DocumentCreateResponse,
+    DocumentCreateMeta,
+    PresignedUploadRequest,
+    PresignedUploadResponse,
+    PresignedUploadComplete,
+)
+from app.documents.doc_repository import DocumentRepository
+from app.documents.services.upload import validate_upload_filename, start_ingestion, MAX_FILE_SIZE_BYTES
+from app.clients.minio_client import AsyncMinioClient
+from app.clients.docs_api_client import DocsApiClient
+from app.auth.models import AuthUser
+from app.logger import logger
+
+
+def _object_name(upload_id: uuid.UUID, filename: str) -> str:
+    file_type = filename.split(".")[-1].lower()
+    return f"{upload_id}.{file_type}"
+
+
+async def init_presigned_upload(
+    payload: PresignedUploadRequest,
+    user: AuthUser,
+    minio_client: AsyncMinioClient,
+    repo: DocumentRepository,
+) -> PresignedUploadResponse:
+    """
+    Первая фаза загрузки: проверяет метаданные и уникальность имени
+    и выдаёт presigned PUT-ссылку, по которой клиент грузит файл прямо в MinIO.
+    """
+    validate_upload_filename(payload.filename)
+
+    if await repo.is_name_exists_for_user(user.id, payload.name):
+        raise HTTPException(status_code=400, detail="Документ с таким именем уже существует")
+
+    upload_id = uuid.uuid4()
+    expires_in = settings.MINIO_PRESIGNED_EXPIRES_SECONDS
+
+    try:
+        upload_url = await minio_client.get_presigned_upload_url(
+            object_name=_object_name(upload_id, payload.filename),
+            expires_seconds=expires_in,
+        )
+    except Exception as e:
+        logger.error(f"Ошибка создания presigned-ссылки: {repr(e)}")
+        raise HTTPException(status_code=500, detail="Ошибка при подготовке загрузки")
+
+    logger.info(f"Выдана ссылка на загрузку {upload_id} пользователю {user.id}: {payload.filename}")
+    return PresignedUploadResponse(upload_id=upload_id, upload_url=upload_url, expires_in=expires_in)
+
+
+async def complete_presigned_upload(
+    payload: PresignedUploadComplete,
+    user: AuthUser,
+    minio_client: AsyncMinioClient,
+    repo: DocumentRepository,
+    docs_api_client: DocsApiClient,
+) -> DocumentCreateResponse:
+    """
+    Вторая фаза загрузки: проверяет загруженный объект в MinIO,
+    создаёт запись документа и запускает индексацию.
+    """
+    validate_upload_filename(payload.filename)
+
+    if await repo.document_id_exists(payload.upload_id):
+        raise HTTPException(status_code=409, detail="Загрузка уже завершена")
+
+    if await repo.is_name_exists_for_user(user.id, payload.name):
+        raise HTTPException(status_code=400, detail="Документ с таким именем уже существует")
+
+    object_name = _object_name(payload.upload_id, payload.filename)
+
+    try:
+        stat = await minio_client.stat_document(object_name)
+    except Exception as e:
+        logger.error(f"Ошибка проверки объекта {object_name} в MinIO: {repr(e)}")
+        raise HTTPException(status_code=500, detail="Ошибка при проверке загруженного файла")
+
+    if stat is None:
+        raise HTTPException(status_code=400, detail="Файл не загружен")
+
+    if not stat.size or stat.size > MAX_FILE_SIZE_BYTES:
+        await minio_client.delete_documents(object_name)
+        detail = "Файл пустой" if not stat.size else "Размер файла превышает 100MB"
+        logger.warning(f"Загрузка {payload.upload_id} отклонена: {detail}")
+        raise HTTPException(status_code=400, detail=detail)
+
+    try:
+        result = await repo.add_document(
+            doc_id=payload.upload_id,
+            metadata=DocumentCreateMeta(name=payload.name, description=payload.description),
+            original_filename=payload.filename,
+            type=payload.filename.split(".")[-1].lower(),
+            size=stat.size,
+            user_id=user.id,
+            storage_key=object_name,
+            added_by_admin=user.is_superuser,
+        )
+    except Exception:
+        try:
+            await minio_client.delete_documents(object_name)
+            logger.info(f"Файл {object_name} удалён из MinIO после ошибки в БД.")
+        except Exception as e:
+            logger.critical(f"Ошибка при удалении из MinIO после сбоя: {repr(e)}")
+        raise HTTPException(status_code=500, detail="Ошибка при сохранении документа")
+
+    await start_ingestion(
+        doc_id=payload.upload_id,
+        storage_key=object_name,
+        original_filename=payload.filename,
+        repo=repo,
+        docs_api_client=docs_api_client,
+    )
+
+    return result
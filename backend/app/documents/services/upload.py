@@ -2,42 +2,49 @@ import uuid
 import httpx
 from fastapi import UploadFile, HTTPException
 
-from app.documents.schemas import DocumentCreateResponse, DocumentCreateMeta
+from app.documents.schemas import DocumentCreateResponse, DocumentCreateMeta, IngestionJob
+from app.documents.models import IngestionStatus
 from app.documents.doc_repository import DocumentRepository
-from app.clients.minio_client import MinioClient
+from app.clients.minio_client import AsyncMinioClient, FileTooLargeError
 from app.clients.docs_api_client import DocsApiClient
 from app.auth.models import AuthUser
 from app.logger import logger
 
 
 MAX_FILE_SIZE_MB = 100
+MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 ALLOWED_EXTENSIONS = {".docx"}
 
+
+def validate_upload_filename(filename: str | None) -> None:
+    if not filename:
+        logger.warning("Файл не загружен")
+        raise HTTPException(status_code=400, detail="Файл не загружен")
+
+    if not any(filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS):
+        logger.warning(f"Недопустимый тип файла: {filename}")
+        raise HTTPException(status_code=400, detail="Неподдерживаемый тип файла")
+
+
 async def save_document(
     file: UploadFile,
     user: AuthUser,
     metadata: DocumentCreateMeta,
-    minio_client: MinioClient,
+    minio_client: AsyncMinioClient,
     repo: DocumentRepository,
     docs_api_client: DocsApiClient,
 ) -> DocumentCreateResponse:
     logger.info(f"Начало загрузки документа пользователем {user.id}: {file.filename}")
 
-    if not file.filename:
-        logger.warning("Файл не загружен")
-        raise HTTPException(status_code=400, detail="Файл не загружен")
-
-    if not any(file.filename.lower().endswith(ext) for ext in ALLOWED_EXTENSIONS):
-        logger.warning(f"Недопустимый тип файла: {file.filename}")
-        raise HTTPException(status_code=400, detail="Неподдерживаемый тип файла")
+    validate_upload_filename(file.filename)
 
-    contents = await file.read()
-    if not contents:
+    # Размер из заголовков multipart известен заранее не всегда,
+    # окончательно он проверяется при потоковой загрузке в MinIO
+    if file.size is not None and file.size == 0:
         logger.warning("Файл пустой")
         raise HTTPException(status_code=400, detail="Файл пустой")
 
-    file_size = len(contents)
-    if file_size > MAX_FILE_SIZE_MB * 1024 * 1024:
+    if file.size is not None and file.size > MAX_FILE_SIZE_BYTES:
         logger.warning("Файл превышает допустимый размер")
         raise HTTPException(status_code=400, detail="Размер файла превышает 100MB")
 
@@ -50,15 +57,25 @@ async def save_document(
     content_type = file.content_type or "application/octet-stream"
 
     try:
-        minio_client.upload_document(
-            file_bytes=contents,
+        await file.seek(0)
+        file_size, _ = await minio_client.upload_stream(
+            stream=file.file,
             object_name=object_name,
-            content_type=content_type
+            content_type=content_type,
+            max_size=MAX_FILE_SIZE_BYTES,
         )
+    except FileTooLargeError:
+        logger.warning("Файл превышает допустимый размер")
+        raise HTTPException(status_code=400, detail="Размер файла превышает 100MB")
     except Exception as e:
         logger.error(f"Ошибка загрузки файла в MinIO: {repr(e)}")
         raise HTTPException(status_code=500, detail="Ошибка при сохранении в MinIO")
 
+    if file_size == 0:
+        logger.warning("Файл пустой")
+        await minio_client.delete_documents(object_name)
+        raise HTTPException(status_code=400, detail="Файл пустой")
+
     try:
         result = await repo.add_document(
             doc_id=doc_id,
@@ -72,19 +89,52 @@ async def save_document(
         )
     except Exception:
         try:
-            minio_client.delete_document(object_name)
+            await minio_client.delete_documents(object_name)
             logger.info(f"Файл {object_name} удалён из MinIO после ошибки в БД.")
         except Exception as e:
             logger.critical(f"Ошибка при удалении из MinIO после сбоя: {repr(e)}")
         raise HTTPException(status_code=500, detail="Ошибка при сохранении документа")
     
+    await start_ingestion(
+        doc_id=doc_id,
+        storage_key=object_name,
+        original_filename=file.filename,
+        repo=repo,
+        docs_api_client=docs_api_client,
+    )
+
+    return result
+
+
+async def start_ingestion(
+    doc_id: uuid.UUID,
+    storage_key: str,
+    original_filename: str,
+    repo: DocumentRepository,
+    docs_api_client: DocsApiClient,
+) -> IngestionJob:
+    """
+    Ставит документ в очередь индексации docs_api и сохраняет задачу в БД.
+    Если docs_api недоступен, сохраняется задача в статусе failed.
+    """
     try:
-        await docs_api_client.ingest_document(
+        job = await docs_api_client.ingest_document(
             document_id=str(doc_id),
-            storage_key=object_name,
-            original_filename=file.filename,
+            storage_key=storage_key,
+            original_filename=original_filename,
         )
     except Exception as e:
         logger.error(f"Ошибка при вызове docs_api для обработки документа: {repr(e)}")
-    
-    return result
+        job = IngestionJob(
+            job_id=uuid.uuid4(),
+            document_id=doc_id,
+            status=IngestionStatus.failed,
+            error="Не удалось поставить документ в очередь индексации",
+        )
+
+    try:
+        await repo.save_ingestion_job(job)
+    except Exception as e:
+        logger.error(f"Ошибка при сохранении задачи индексации документа {doc_id}: {repr(e)}")
+
+    return job
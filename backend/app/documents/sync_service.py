@@ -1,72 +1,235 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+from datetime import datetime, timedelta, timezone
 
-from app.clients.minio_client import MinioClient
+from app.config import settings
+from app.database import async_session_maker
+from app.clients.minio_client import AsyncMinioClient
 from app.documents.doc_repository import DocumentRepository
+from app.documents.schemas import Document, IngestionJob
 from app.clients.docs_api_client import DocsApiClient
 from app.logger import logger
 
 
-async def sync_documents_with_storage(
-    session: AsyncSession,
-    minio_client: MinioClient,
-    docs_api_client: DocsApiClient,
-):
-    repo = DocumentRepository(session)
-
-    # Получаем документы из Postgres
-    postgres_docs = await repo.get_all_documents_from_repo()
-    postgres_keys = {doc.storage_key: doc.id for doc in postgres_docs}
-    postgres_key_set = set(postgres_keys.keys())
-    postgres_ids = {str(doc.id) for doc in postgres_docs}
-
-    # Получаем объекты из MinIO
-    minio_keys_full = minio_client.list_documents()
-    prefix = f"{minio_client.root_path}/" if minio_client.root_path else ""
-    minio_keys = {k[len(prefix):] for k in minio_keys_full if k.startswith(prefix)}
-
-    # Получаем коллекции из ChromaDB
-    chroma_ids = set(await docs_api_client.get_collections())
-
-    # --- Синхронизация MinIO ↔️ Postgres ---
-    only_in_postgres = postgres_key_set - minio_keys
-    only_in_minio = minio_keys - postgres_key_set
-
-    if only_in_postgres:
-        doc_ids_to_delete = [postgres_keys[k] for k in only_in_postgres]
-        await repo.delete_documents(doc_ids_to_delete)
-        logger.warning(f"Удалены документы из Postgres: {only_in_postgres}")
-        actual_postgres_ids = postgres_ids - {str(doc_id) for doc_id in doc_ids_to_delete}
-    else:
-        actual_postgres_ids = postgres_ids
-
-    if only_in_minio:
-        minio_client.delete_documents(list(only_in_minio))
-        logger.warning(f"Удалены объекты из MinIO: {only_in_minio}")
-
-    # --- Восстановление недостающих коллекций в ChromaDB ---
-    missing_in_chroma = actual_postgres_ids - chroma_ids
-    for missing_id in missing_in_chroma:
-        logger.warning(f"Коллекция {missing_id} отсутствует в ChromaDB — восстанавливаем через Docs API.")
-        try:
-            doc = next(d for d in postgres_docs if str(d.id) == missing_id)
-
-            # Для простоты передаем только метаданные, Docs API сам возьмет текст из MinIO при индексации
-            await docs_api_client.ingest_document(
-                document_id=str(doc.id),
-                storage_key=doc.storage_key,
-                original_filename=doc.name,
-            )
-            logger.info(f"Восстановлена коллекция {missing_id} в ChromaDB через Docs API")
-        except Exception as e:
-            logger.error(f"Ошибка восстановления коллекции {missing_id}: {repr(e)}")
-
-    # --- Удаление "мусорных" коллекций из ChromaDB ---
-    extra_in_chroma = chroma_ids - actual_postgres_ids
-    for collection_id in extra_in_chroma:
+SYNC_STATE_NAME = "documents"
+
+
+class StorageSync:
+    """
+    Фоновая сверка Postgres ↔ MinIO ↔ ChromaDB.
+
+    Запускается после старта приложения и затем периодически, не блокируя lifespan.
+    Контрольная точка (время запусков, ETag объектов MinIO, итоги) хранится
+    в таблице storage_sync_state. По ней каждый запуск находит объекты, содержимое
+    которых изменилось, и переиндексирует только их; недостающие коллекции
+    восстанавливаются с ограниченной параллельностью.
+    Объекты и записи моложе STORAGE_SYNC_GRACE_SECONDS не удаляются —
+    они могут принадлежать загрузке, которая ещё не завершена.
+    """
+
+    def __init__(self, minio_client: AsyncMinioClient, docs_api_client: DocsApiClient):
+        self.minio_client = minio_client
+        self.docs_api_client = docs_api_client
+        self._task: asyncio.Task | None = None
+        self._run_lock = asyncio.Lock()
+        self._progress: dict = {"running": False, "phase": "idle", "runs": 0}
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
         try:
-            await docs_api_client.delete_document(collection_id)
-            logger.warning(f"Удалена лишняя коллекция из ChromaDB через Docs API: {collection_id}")
-        except Exception as e:
-            logger.error(f"Ошибка удаления коллекции {collection_id}: {repr(e)}")
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def progress(self) -> dict:
+        return dict(self._progress)
+
+    async def _loop(self) -> None:
+        await asyncio.sleep(settings.STORAGE_SYNC_START_DELAY_SECONDS)
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Ошибка фоновой синхронизации хранилищ: {repr(e)}")
+            await asyncio.sleep(settings.STORAGE_SYNC_INTERVAL_SECONDS)
+
+    def _set_phase(self, phase: str, **values) -> None:
+        self._progress.update(phase=phase, **values)
+
+    async def run_once(self) -> dict:
+        """Один проход сверки. Параллельные вызовы не запускают второй проход."""
+        if self._run_lock.locked():
+            return self.progress()
+
+        async with self._run_lock:
+            started_at = datetime.now(timezone.utc)
+            self._progress = {
+                "running": True,
+                "phase": "listing",
+                "runs": self._progress.get("runs", 0) + 1,
+                "started_at": started_at,
+                "finished_at": None,
+                "reingest_total": 0,
+                "reingest_done": 0,
+                "reingest_failed": 0,
+                "error": None,
+            }
+
+            async with async_session_maker() as session:
+                repo = DocumentRepository(session)
+                state = await repo.get_sync_state(SYNC_STATE_NAME) or {}
+                await repo.save_sync_state(SYNC_STATE_NAME, started_at=started_at, finished_at=None)
+
+                try:
+                    stats, object_etags = await self._sync(repo, state.get("object_etags") or {}, started_at)
+                except Exception as e:
+                    self._progress.update(running=False, phase="failed", error=repr(e),
+                                          finished_at=datetime.now(timezone.utc))
+                    await session.rollback()
+                    await repo.save_sync_state(
+                        SYNC_STATE_NAME,
+                        finished_at=self._progress["finished_at"],
+                        error=repr(e),
+                    )
+                    raise
+
+                finished_at = datetime.now(timezone.utc)
+                await repo.save_sync_state(
+                    SYNC_STATE_NAME,
+                    finished_at=finished_at,
+                    last_success_at=finished_at,
+                    object_etags=object_etags,
+                    stats=stats,
+                    error=None,
+                )
+
+            self._progress.update(running=False, phase="done", finished_at=finished_at, **stats)
+            logger.info(f"Синхронизация между Postgres, MinIO и ChromaDB завершена: {stats}")
+            return self.progress()
+
+    async def _sync(
+        self,
+        repo: DocumentRepository,
+        previous_etags: dict[str, str],
+        started_at: datetime,
+    ) -> tuple[dict, dict[str, str]]:
+        grace_border = started_at - timedelta(seconds=settings.STORAGE_SYNC_GRACE_SECONDS)
+
+        # Получаем документы из Postgres, объекты из MinIO и коллекции из ChromaDB
+        postgres_docs, objects, chroma_ids = await asyncio.gather(
+            repo.get_all_documents_from_repo(),
+            self.minio_client.list_objects_info(),
+            self.docs_api_client.get_collections(),
+        )
+        chroma_ids = set(chroma_ids)
+
+        prefix = f"{self.minio_client.root_path}/" if self.minio_client.root_path else ""
+        minio_objects = {
+            obj.object_name[len(prefix):]: obj
+            for obj in objects if obj.object_name.startswith(prefix)
+        }
+        object_etags = {key: obj.etag for key, obj in minio_objects.items()}
+        docs_by_key = {doc.storage_key: doc for doc in postgres_docs}
+
+        # --- Синхронизация MinIO ↔️ Postgres ---
+        self._set_phase("storage")
+        only_in_postgres = [
+            doc for key, doc in docs_by_key.items()
+            if key not in minio_objects and doc.created_at < grace_border
+        ]
+        only_in_minio = [
+            key for key, obj in minio_objects.items()
+            if key not in docs_by_key and obj.last_modified is not None and obj.last_modified < grace_border
+        ]
+
+        if only_in_postgres:
+            await repo.delete_documents([doc.id for doc in only_in_postgres])
+            logger.warning(f"Удалены документы из Postgres: {[doc.storage_key for doc in only_in_postgres]}")
+        if only_in_minio:
+            await self.minio_client.delete_documents(only_in_minio)
+            logger.warning(f"Удалены объекты из MinIO: {only_in_minio}")
+            for key in only_in_minio:
+                object_etags.pop(key, None)
+
+        removed_ids = {doc.id for doc in only_in_postgres}
+        actual_docs = [doc for doc in postgres_docs if doc.id not in removed_ids and doc.storage_key in minio_objects]
+        actual_ids = {str(doc.id) for doc in postgres_docs if doc.id not in removed_ids}
+
+        # --- Выбор документов для (пере)индексации ---
+        stale_job_border = started_at - timedelta(seconds=settings.STORAGE_SYNC_STALE_JOB_SECONDS)
+        active_ids = await repo.get_active_ingestion_document_ids(updated_after=stale_job_border)
+
+        missing_in_chroma = [
+            doc for doc in actual_docs
+            if str(doc.id) not in chroma_ids and doc.id not in active_ids
+        ]
+        # Объект с тем же ключом, но другим ETag — содержимое заменено, индекс устарел
+        changed = [
+            doc for doc in actual_docs
+            if doc.storage_key in previous_etags
+            and previous_etags[doc.storage_key] != object_etags.get(doc.storage_key)
+            and doc.id not in active_ids
+            and str(doc.id) in chroma_ids
+        ]
+        to_ingest = missing_in_chroma + changed
+
+        self._set_phase("reingest", reingest_total=len(to_ingest))
+        jobs = await self._reingest(to_ingest)
+        for job in jobs:
+            await repo.save_ingestion_job(job)
+
+        # --- Удаление "мусорных" коллекций из ChromaDB ---
+        self._set_phase("collections")
+        extra_in_chroma = chroma_ids - actual_ids
+        for collection_id in extra_in_chroma:
+            try:
+                await self.docs_api_client.delete_document(collection_id)
+                logger.warning(f"Удалена лишняя коллекция из ChromaDB через Docs API: {collection_id}")
+            except Exception as e:
+                logger.error(f"Ошибка удаления коллекции {collection_id}: {repr(e)}")
+
+        stats = {
+            "documents": len(postgres_docs),
+            "objects": len(minio_objects),
+            "collections": len(chroma_ids),
+            "deleted_documents": len(only_in_postgres),
+            "deleted_objects": len(only_in_minio),
+            "deleted_collections": len(extra_in_chroma),
+            "missing_collections": len(missing_in_chroma),
+            "changed_objects": len(changed),
+            "reingest_done": self._progress["reingest_done"],
+            "reingest_failed": self._progress["reingest_failed"],
+        }
+        return stats, object_etags
+
+    async def _reingest(self, docs: list[Document]) -> list[IngestionJob]:
+        """Ставит документы в очередь индексации docs_api с ограниченной параллельностью."""
+        semaphore = asyncio.Semaphore(settings.STORAGE_SYNC_REINGEST_CONCURRENCY)
+
+        async def reingest(doc: Document) -> IngestionJob | None:
+            async with semaphore:
+                try:
+                    # Docs API сам возьмет файл из MinIO при индексации
+                    job = await self.docs_api_client.ingest_document(
+                        document_id=str(doc.id),
+                        storage_key=doc.storage_key,
+                        original_filename=doc.original_filename,
+                    )
+                    self._progress["reingest_done"] += 1
+                    logger.info(f"Переиндексация документа {doc.id} поставлена в очередь Docs API: задача {job.job_id}")
+                    return job
+                except Exception as e:
+                    self._progress["reingest_failed"] += 1
+                    logger.error(f"Ошибка восстановления коллекции {doc.id}: {repr(e)}")
+                    return None
 
-    logger.info("Синхронизация между Postgres, MinIO и ChromaDB завершена")
+        results = await asyncio.gather(*(reingest(doc) for doc in docs))
+        return [job for job in results if job is not None]
@@ -6,10 +6,10 @@ from contextlib import asynccontextmanager
 from app.config import settings
 from app.routers import include_routers
 from app.auth.init_db import delayed_admin_init
-from app.documents.sync_service import sync_documents_with_storage
 from app.database import async_session_maker
 from app.dependencies.minio import get_minio_client
 from app.dependencies.docs_api import get_docs_api_client
+from app.dependencies.storage_sync import get_storage_sync
 
 
 @asynccontextmanager
@@ -19,14 +19,18 @@ async def lifespan(app: FastAPI):
         
         minio_client = get_minio_client()
         docs_api_client = get_docs_api_client()
-        await sync_documents_with_storage(
-            session=session,
-            minio_client=minio_client,
-            docs_api_client=docs_api_client,
-        )
+        await docs_api_client.start()
+
+        # Сверка хранилищ идёт в фоне и повторяется периодически
+        storage_sync = get_storage_sync()
+        storage_sync.start()
 
         yield
 
+    await storage_sync.stop()
+    await docs_api_client.aclose()
+    minio_client.shutdown()
+
 
 app = FastAPI(
     title="DOCS-CHAT-BOT",
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+
+from app.auth.models import AuthUser
+from app.auth.auth_config import current_superuser
+from app.clients.minio_client import AsyncMinioClient
+from app.clients.docs_api_client import DocsApiClient
+from app.dependencies.minio import get_minio_client
+from app.dependencies.docs_api import get_docs_api_client
+from app.dependencies.storage_sync import get_storage_sync
+from app.documents.sync_service import StorageSync
+from app.metrics.schemas import MinioStats, DocsApiPoolStats, StorageSyncProgress
+
+
+router = APIRouter()
+
+
+@router.get("/minio", response_model=MinioStats)
+async def minio_stats(
+    user: AuthUser = Depends(current_superuser),
+    minio_client: AsyncMinioClient = Depends(get_minio_client),
+):
+    return minio_client.stats()
+
+
+@router.get("/docs_api", response_model=DocsApiPoolStats)
+async def docs_api_stats(
+    user: AuthUser = Depends(current_superuser),
+    docs_api_client: DocsApiClient = Depends(get_docs_api_client),
+):
+    return docs_api_client.stats()
+
+
+@router.get("/storage_sync", response_model=StorageSyncProgress)
+async def storage_sync_progress(
+    user: AuthUser = Depends(current_superuser),
+    storage_sync: StorageSync = Depends(get_storage_sync),
+):
+    return storage_sync.progress()
@@ -0,0 +1,55 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class OperationLatencyStats(BaseModel):
+    count: int
+    errors: int
+    avg_ms: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+
+class MinioStats(BaseModel):
+    max_workers: int
+    in_flight: int
+    operations: dict[str, OperationLatencyStats]
+
+
+class DocsApiEndpointStats(BaseModel):
+    requests: int
+    errors: int
+    in_flight: int
+    avg_ms: float
+
+
+class DocsApiPoolStats(BaseModel):
+    started: bool
+    http2: bool
+    max_connections: int
+    max_keepalive_connections: int
+    connections: int
+    idle_connections: int
+    active_connections: int
+    endpoints: dict[str, DocsApiEndpointStats]
+
+
+class StorageSyncProgress(BaseModel):
+    running: bool
+    phase: str
+    runs: int
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    reingest_total: int = 0
+    reingest_done: int = 0
+    reingest_failed: int = 0
+    documents: int | None = None
+    objects: int | None = None
+    collections: int | None = None
+    deleted_documents: int | None = None
+    deleted_objects: int | None = None
+    deleted_collections: int | None = None
+    missing_collections: int | None = None
+    changed_objects: int | None = None
+    error: str | None = None
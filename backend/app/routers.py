@@ -8,6 +8,7 @@ from app.documents.router import router as documents_router
 from app.admin_requests.router import router as admin_requests_router
 from app.core.router import router as core_router
 from app.feedbacks.router import router as feedback_router
+from app.metrics.router import router as metrics_router
 
 
 def include_routers(app: FastAPI):
@@ -32,3 +33,4 @@ def include_routers(app: FastAPI):
     app.include_router(admin_requests_router, prefix="/admin", tags=["Admin"])
     app.include_router(core_router)
     app.include_router(feedback_router)
+    app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
@@ -0,0 +1,45 @@
+"""ingestion jobs
+
+Revision ID: b7e1c4a9d2f0
+Revises: ac58d522cfa3
+Create Date: 2026-10-18 09:12:41.503214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e1c4a9d2f0'
+down_revision: Union[str, None] = 'ac58d522cfa3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ingestion_status_enum = postgresql.ENUM(
+    'queued', 'parsing', 'embedding', 'done', 'failed', name='ingestionstatus'
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingestion_jobs',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('document_id', sa.UUID(), nullable=False),
+        sa.Column('status', ingestion_status_enum, nullable=False),
+        sa.Column('chunk_count', sa.Integer(), nullable=True),
+        sa.Column('timings', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ingestion_jobs_document_id', 'ingestion_jobs', ['document_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ingestion_jobs_document_id', table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
+    ingestion_status_enum.drop(op.get_bind())
@@ -1,105 +1,330 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Coroutine, Iterator, NamedTuple, TypeVar
+
 import chromadb
+import numpy as np
+from chromadb.api import AsyncClientAPI
 from chromadb.config import Settings
-from langchain_chroma import Chroma
+from chromadb.errors import NotFoundError
+from langchain_core.callbacks import CallbackManagerForRetrieverRun, AsyncCallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
 
 from app.config import settings
 from app.logger import logger
 from app.clients.openai_api_client import CustomOllamaEmbeddings
 from app.documents.schemas import Chunk
+from app.documents.chunk_table import ChunkTable
+from app.documents.metadata_schema import project_metadata, metadata_size, index_version, INDEX_VERSION_KEY
+
+
+T = TypeVar("T")
+
+
+class ChunkRecord(NamedTuple):
+    id: str
+    text: str
+    metadata: dict | None
 
 
 class ChromaDBManager:
-    def __init__(self):
-        self._client = chromadb.HttpClient(
-            host=settings.CHROMADB_HOST,
-            port=settings.CHROMADB_PORT,
-            settings=Settings(
-                is_persistent=True,
-                persist_directory=settings.PERSIST_DIRECTORY,
-                chroma_client_auth_provider=settings.CHROMA_CLIENT_AUTH_PROVIDER,
-                chroma_client_auth_credentials=settings.CHROMA_SERVER_AUTHN_CREDENTIALS,
-            ),
-        )
-        self.embeddings = CustomOllamaEmbeddings()
+    """
+    Асинхронный менеджер ChromaDB поверх chromadb.AsyncHttpClient.
+    Клиент (и его пул соединений) создаётся лениво при первом обращении и переиспользуется.
+    Хэндлы коллекций кэшируются по имени коллекции и сбрасываются при её удалении,
+    а также при NotFoundError от Chroma (коллекция удалена или пересоздана не через этот процесс).
+    Чтение несуществующей коллекции не создаёт её: методы чтения возвращают пустой результат.
+    """
 
-    def get_vectorstore(self, collection_name: str) -> Chroma:
-        self._get_collection(collection_name)
+    def __init__(self, embeddings: Embeddings | None = None):
+        self._client: AsyncClientAPI | None = None
+        self._client_lock = asyncio.Lock()
+        # Цикл событий, к которому привязан AsyncHttpClient (нужен синхронному вызову ретривера)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.embeddings = embeddings or CustomOllamaEmbeddings()
+        self._collections: dict[str, Any] = {}
 
-        return Chroma(
-            client=self._client,
-            collection_name=collection_name,
-            embedding_function=self.embeddings,
-            persist_directory=settings.PERSIST_DIRECTORY,
-        )
+    async def _get_client(self) -> AsyncClientAPI:
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    self._loop = asyncio.get_running_loop()
+                    self._client = await chromadb.AsyncHttpClient(
+                        host=settings.CHROMADB_HOST,
+                        port=settings.CHROMADB_PORT,
+                        settings=Settings(
+                            is_persistent=True,
+                            persist_directory=settings.PERSIST_DIRECTORY,
+                            chroma_client_auth_provider=settings.CHROMA_CLIENT_AUTH_PROVIDER,
+                            chroma_client_auth_credentials=settings.CHROMA_SERVER_AUTHN_CREDENTIALS,
+                        ),
+                    )
+        return self._client
 
-    def _get_collection(self, collection_name: str):
-        return self._client.get_or_create_collection(name=collection_name)
+    async def aclose(self) -> None:
+        """Закрывает HTTP-клиент Chroma и сбрасывает закэшированные хэндлы коллекций."""
+        client, self._client = self._client, None
+        self._loop = None
+        self._collections.clear()
+        if client is None:
+            return
+        # У AsyncClientAPI нет публичного close: httpx-клиенты (по одному на цикл событий)
+        # держит серверный API AsyncFastAPI и закрывает их в _cleanup
+        cleanup = getattr(getattr(client, "_server", None), "_cleanup", None)
+        if cleanup is not None:
+            await cleanup()
+
+    def run_sync(self, coro: Coroutine[Any, Any, T]) -> T:
+        """
+        Выполняет корутину менеджера из синхронного кода. Если клиент уже привязан
+        к работающему циклу событий (приложение), корутина отправляется в него,
+        а текущий поток ждёт результата. Без работающего цикла корутина выполняется
+        во временном цикле (asyncio.run) со своим клиентом, который закрывается
+        вместе с циклом; клиент и хэндлы менеджера при этом не подменяются.
+        Вызов из потока самого цикла заблокировал бы его — там нужен await.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed() or not loop.is_running():
+            return self._run_in_temporary_loop(coro)
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("Синхронный вызов ChromaDBManager из цикла событий заблокирует его — используйте await / ainvoke")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def _run_in_temporary_loop(self, coro: Coroutine[Any, Any, T]) -> T:
+        saved = (self._client, self._client_lock, self._loop, self._collections)
+        self._client, self._client_lock, self._loop, self._collections = None, asyncio.Lock(), None, {}
+
+        async def run() -> T:
+            try:
+                return await coro
+            finally:
+                await self.aclose()
 
-    def get_collection_length(self, collection_name: str) -> int:
         try:
-            collection = self._get_collection(collection_name)
-            return collection.count()
+            return asyncio.run(run())
+        finally:
+            client, lock, loop, collections = saved
+            if loop is not None and loop.is_closed():
+                # Клиент был привязан к уже закрытому циклу — пусть создастся заново
+                client, loop, collections = None, None, {}
+            self._client, self._client_lock, self._loop, self._collections = client, lock, loop, collections
+
+    def as_retriever(self, collection_name: str, k: int = 3) -> "ChromaCollectionRetriever":
+        return ChromaCollectionRetriever(chroma_manager=self, collection_name=collection_name, k=k)
+
+    async def _get_collection(self, collection_name: str, create: bool = False):
+        """
+        Возвращает хэндл коллекции из кэша или запрашивает его у Chroma.
+        Без create=True для неизвестной коллекции возвращает None (отсутствие не кэшируется).
+        """
+        collection = self._collections.get(collection_name)
+        if collection is not None:
+            return collection
+
+        client = await self._get_client()
+        # Эмбеддинги всегда считаем сами, встроенная embedding-функция Chroma не нужна
+        if create:
+            collection = await client.get_or_create_collection(name=collection_name, embedding_function=None)
+        else:
+            try:
+                collection = await client.get_collection(name=collection_name, embedding_function=None)
+            except (NotFoundError, ValueError):
+                return None
+
+        self._collections[collection_name] = collection
+        return collection
+
+    def invalidate(self, collection_name: str) -> None:
+        """Сбрасывает закэшированный хэндл коллекции."""
+        self._collections.pop(collection_name, None)
+
+    @contextmanager
+    def _evict_on_not_found(self, collection_name: str) -> Iterator[None]:
+        """Сбрасывает хэндл, если Chroma ответила, что коллекции нет: следующий вызов запросит её заново."""
+        try:
+            yield
+        except NotFoundError:
+            self.invalidate(collection_name)
+            raise
+
+    async def collection_exists(self, collection_name: str) -> bool:
+        return await self._get_collection(collection_name) is not None
+
+    async def get_collection_length(self, collection_name: str) -> int:
+        try:
+            collection = await self._get_collection(collection_name)
+            if collection is None:
+                return 0
+            with self._evict_on_not_found(collection_name):
+                return await collection.count()
         except Exception as e:
             logger.error(f"Не удалось получить размер коллекции '{collection_name}': {e}")
             return 0
     
-    def get_list_collections(self) -> list[str]:
+    async def get_list_collections(self) -> list[str]:
         try:
-            collections = self._client.list_collections()
+            client = await self._get_client()
+            collections = await client.list_collections()
             return [collection.name for collection in collections]
         except Exception as e:
             logger.error(f"Ошибка при получении списка коллекций: {e}")
             return []
 
-    def get_all_texts(self, collection_name: str | None = None) -> list[dict]:
+    async def iter_chunks(
+        self,
+        collection_name: str,
+        page_size: int | None = None,
+        include_metadata: bool = True,
+    ) -> AsyncIterator[ChunkRecord]:
         """
-        Получает все тексты из указанной коллекции с метаданными.
-        Если collection_name не указан — возвращает данные из всех коллекций.
-
-        Возвращает список словарей:
-        {
-            "text": str,
-            "metadata": dict,
-            "id": str,
-            "collection": str
-        }
+        Постранично (limit/offset) читает коллекцию и отдаёт чанки по одному.
+        В памяти держится не больше одной страницы ответа Chroma. Пустые тексты пропускаются.
         """
-        all_texts = []
-        try:
-            collections = [collection_name] if collection_name else self.get_list_collections()
-            for coll_name in collections:
-                collection = self._get_collection(coll_name)
-                # ids не нужно явно указывать в include
-                result = collection.get(include=['documents', 'metadatas'], limit=None)
-
-                for text, metadata, doc_id in zip(result['documents'], result['metadatas'], result['ids']):
-                    if text and text.strip():  # защита от пустых строк
-                        all_texts.append({
-                            "text": text,
-                            "metadata": metadata,
-                            "id": doc_id,
-                            "collection": coll_name
-                        })
-        except Exception as e:
-            logger.error(f"Ошибка при получении всех текстов: {e}")
-        return all_texts
+        page_size = page_size or settings.CHROMA_READ_PAGE_SIZE
+        include = ["documents", "metadatas"] if include_metadata else ["documents"]
+        collection = await self._get_collection(collection_name)
+        if collection is None:
+            return
+
+        offset = 0
+        while True:
+            # ids не нужно явно указывать в include
+            with self._evict_on_not_found(collection_name):
+                page = await collection.get(include=include, limit=page_size, offset=offset)
+            ids = page["ids"]
+            if not ids:
+                return
+
+            texts = page["documents"]
+            metadatas = page["metadatas"] if include_metadata else [None] * len(ids)
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                if text and text.strip():  # защита от пустых строк
+                    yield ChunkRecord(chunk_id, text, metadata)
 
+            if len(ids) < page_size:
+                return
+            offset += page_size
 
+    async def iter_chunk_ids(self, collection_name: str, page_size: int | None = None) -> AsyncIterator[str]:
+        """Постранично отдаёт IDs чанков коллекции, не загружая тексты."""
+        page_size = page_size or settings.CHROMA_READ_PAGE_SIZE
+        collection = await self._get_collection(collection_name)
+        if collection is None:
+            return
 
-    def _add_texts(self, collection_name: str, texts: list[str], ids: list[str], metadatas: list[dict] | None = None) -> list[str]:
-        """Добавляет документы в указанную коллекцию Chroma."""
-        vectorstore = self.get_vectorstore(collection_name)
-        max_attempts = 3
+        offset = 0
+        while True:
+            with self._evict_on_not_found(collection_name):
+                page = await collection.get(include=[], limit=page_size, offset=offset)
+            ids = page["ids"]
+            for chunk_id in ids:
+                yield chunk_id
+            if len(ids) < page_size:
+                return
+            offset += page_size
+
+    async def get_chunk_at(self, collection_name: str, offset: int) -> ChunkRecord | None:
+        """Возвращает чанк по его позиции в коллекции (для случайной выборки без чтения всей коллекции)."""
+        collection = await self._get_collection(collection_name)
+        if collection is None:
+            return None
+        with self._evict_on_not_found(collection_name):
+            page = await collection.get(include=["documents"], limit=1, offset=offset)
+        if not page["ids"]:
+            return None
+        return ChunkRecord(page["ids"][0], page["documents"][0] or "", None)
+
+    async def similarity_search(self, collection_name: str, query: str, k: int = 3) -> list[Document]:
+        """Возвращает k ближайших к запросу чанков коллекции."""
+        collection = await self._get_collection(collection_name)
+        if collection is None:
+            logger.warning(f"Коллекция '{collection_name}' не найдена, поиск пропущен.")
+            return []
+        query_embedding = await self.embeddings.aembed_query(query)
+        with self._evict_on_not_found(collection_name):
+            result = await collection.query(
+                query_embeddings=[query_embedding],
+                n_results=k,
+                include=['documents', 'metadatas'],
+            )
+
+        documents = []
+        for text, metadata, doc_id in zip(result['documents'][0], result['metadatas'][0], result['ids'][0]):
+            documents.append(Document(page_content=text or "", metadata=metadata or {}, id=doc_id))
+        return documents
+
+    async def _add_texts(self, collection_name: str, texts: list[str], ids: list[str], metadatas: list[dict] | None = None) -> list[str]:
+        """
+        Добавляет документы в указанную коллекцию Chroma идемпотентным upsert батчами;
+        повторяется только запись упавшего батча.
+        Батч пропускается, если все его чанки уже лежат в коллекции с теми же
+        метаданными (например, после прерванной попытки): IDs детерминированы
+        (Chunk.content_id), а метаданные содержат index_version — модель эмбеддингов
+        и схему метаданных, поэтому их смена ведёт к перезаписи, а не к пропуску.
+        Эмбеддинги считаются только для батчей, которые нужно записать.
+        """
+        collection = await self._get_collection(collection_name, create=True)
+        batch_size = settings.CHROMA_WRITE_BATCH_SIZE
+        batches = [(start, min(start + batch_size, len(ids))) for start in range(0, len(ids), batch_size)]
+
+        with self._evict_on_not_found(collection_name):
+            if await collection.count() > 0:
+                pending = []
+                for start, end in batches:
+                    existing = await collection.get(ids=ids[start:end], include=["metadatas"])
+                    stored = dict(zip(existing["ids"], existing["metadatas"]))
+                    expected = metadatas[start:end] if metadatas else [None] * (end - start)
+                    if any(stored.get(chunk_id, ...) != metadata for chunk_id, metadata in zip(ids[start:end], expected)):
+                        pending.append((start, end))
+            else:
+                pending = batches
+
+            if not pending:
+                return list(ids)
+
+            pending_texts = [text for start, end in pending for text in texts[start:end]]
+            embeddings = np.asarray(await self.embeddings.aembed_documents(pending_texts), dtype=np.float32)
+
+            offset = 0
+            for start, end in pending:
+                size = end - start
+                await self._upsert_batch(
+                    collection,
+                    ids=ids[start:end],
+                    documents=texts[start:end],
+                    embeddings=embeddings[offset:offset + size],
+                    metadatas=metadatas[start:end] if metadatas else None,
+                )
+                offset += size
+
+        if len(pending) < len(batches):
+            logger.info(f"Коллекция '{collection_name}': пропущено {len(batches) - len(pending)} уже записанных батчей")
+        return list(ids)
+
+    async def _upsert_batch(self, collection, ids: list[str], documents: list[str], embeddings: np.ndarray, metadatas: list[dict] | None) -> None:
+        max_attempts = settings.CHROMA_WRITE_MAX_ATTEMPTS
+        delay = settings.CHROMA_WRITE_BACKOFF_SECONDS
 
         for attempt in range(1, max_attempts + 1):
             try:
-                return vectorstore.add_texts(texts=texts, ids=ids, metadatas=metadatas)
+                await collection.upsert(ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+                return
             except Exception as e:
-                logger.error(f"Ошибка при добавлении документов в Chroma (попытка {attempt}): {e}")
-        logger.error("Документы не были добавлены в Chroma после всех попыток.")
-        return []
+                logger.error(f"Ошибка при записи батча из {len(ids)} чанков в Chroma (попытка {attempt}/{max_attempts}): {e}")
+                if attempt == max_attempts:
+                    raise
+                await asyncio.sleep(delay)
+                delay *= 2
 
-    def add_chunks(self, collection_name: str, chunks: list[Chunk]) -> list[str]:
+    async def add_chunks(self, collection_name: str, chunks: ChunkTable | list[Chunk]) -> list[str]:
         """Добавляет чанки документа в указанную коллекцию с метаданными."""
         if not chunks:
             logger.info("Список чанков пуст — добавление в Chroma пропущено.")
@@ -107,51 +332,110 @@ class ChromaDBManager:
 
         logger.info(f"Добавление {len(chunks)} чанков в коллекцию '{collection_name}'...")
 
-        texts = [chunk.text for chunk in chunks]
-        ids = [chunk.id for chunk in chunks]
-
-        metadatas = [
-            {
-                "section": chunk.section or "Unknown",
-                "source": chunk.source or "N/A",
-                "page_number": chunk.page_number,
-                "element_type": chunk.element_type,
-                **(chunk.metadata or {})
-            }
-            for chunk in chunks
-        ]
+        table = chunks if isinstance(chunks, ChunkTable) else ChunkTable.from_chunks(chunks)
+        texts = table.texts()
+        ids = table.ids()
+        version = index_version()
+        metadatas = [metadata | {INDEX_VERSION_KEY: version} for metadata in table.metadatas()]
 
-        chunk_ids = self._add_texts(collection_name, texts, ids, metadatas=metadatas)
-        total_chunks = self.get_collection_length(collection_name)
+        chunk_ids = await self._add_texts(collection_name, texts, ids, metadatas=metadatas)
+        total_chunks = await self.get_collection_length(collection_name)
 
         logger.info(
             f"Добавлено {len(chunk_ids)} чанков, всего в коллекции: {total_chunks}"
         )
         return chunk_ids
 
-    def delete_collection(self, collection_name: str) -> None:
+    async def delete_collection(self, collection_name: str) -> None:
         """Удаляет коллекцию по её имени."""
         try:
-            self._client.delete_collection(name=collection_name)
+            client = await self._get_client()
+            self.invalidate(collection_name)
+            await client.delete_collection(name=collection_name)
             logger.info(f"Коллекция '{collection_name}' успешно удалена.")
         except Exception as e:
             logger.error(f"Ошибка при удалении коллекции '{collection_name}': {e}")
+        finally:
+            # Параллельное чтение могло вернуть старый хэндл в кэш, пока шло удаление
+            self.invalidate(collection_name)
 
-    def get_chunk_ids_by_collection(self, collection_name: str) -> list[str]:
+    async def delete_chunks(self, collection_name: str, ids: list[str]) -> None:
+        """Удаляет чанки коллекции по их IDs пакетами."""
+        collection = await self._get_collection(collection_name)
+        if collection is None:
+            return
+        batch_size = settings.CHROMA_WRITE_BATCH_SIZE
+        with self._evict_on_not_found(collection_name):
+            for start in range(0, len(ids), batch_size):
+                await collection.delete(ids=ids[start:start + batch_size])
+        logger.info(f"Из коллекции '{collection_name}' удалено {len(ids)} чанков")
+
+    async def project_collection_metadata(
+        self,
+        collection_name: str,
+        fields: tuple[str, ...] | None = None,
+        apply: bool = False,
+        page_size: int | None = None,
+    ) -> dict:
+        """
+        Проецирует метаданные уже записанных чанков коллекции по белому списку полей.
+        Возвращает объём метаданных до и после; при apply=True перезаписывает их
+        через collection.update (эмбеддинги и тексты не трогаются). Отброшенные
+        ключи передаются со значением None — так Chroma удаляет их из записи.
+        """
+        page_size = page_size or settings.CHROMA_READ_PAGE_SIZE
+        collection = await self._get_collection(collection_name)
+        report = {"collection": collection_name, "chunks": 0, "changed": 0, "bytes_before": 0, "bytes_after": 0}
+        if collection is None:
+            report["bytes_saved"] = 0
+            return report
+
+        offset = 0
+        while True:
+            with self._evict_on_not_found(collection_name):
+                page = await collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            ids = page["ids"]
+
+            changed_ids, changed_metadatas = [], []
+            for chunk_id, metadata in zip(ids, page["metadatas"]):
+                metadata = metadata or {}
+                projected = project_metadata(metadata, fields)
+                report["chunks"] += 1
+                report["bytes_before"] += metadata_size(metadata)
+                report["bytes_after"] += metadata_size(projected)
+                if projected != metadata:
+                    changed_ids.append(chunk_id)
+                    changed_metadatas.append({**{key: None for key in metadata}, **projected})
+
+            report["changed"] += len(changed_ids)
+            if apply and changed_ids:
+                with self._evict_on_not_found(collection_name):
+                    await collection.update(ids=changed_ids, metadatas=changed_metadatas)
+
+            if len(ids) < page_size:
+                break
+            offset += page_size
+
+        report["bytes_saved"] = report["bytes_before"] - report["bytes_after"]
+        return report
+
+    async def get_chunk_ids_by_collection(self, collection_name: str) -> list[str]:
         """Возвращает список всех IDs чанков в коллекции."""
         try:
-            collection = self._get_collection(collection_name)
-            result = collection.get(include=['metadatas'], limit=None)
-            return result['ids']
+            return [chunk_id async for chunk_id in self.iter_chunk_ids(collection_name)]
         except Exception as e:
             logger.error(f"Ошибка при получении IDs из коллекции '{collection_name}': {e}")
             return []
 
-    def get_chunk_by_id(self, collection_name: str, chunk_id: str) -> str | None:
+    async def get_chunk_by_id(self, collection_name: str, chunk_id: str) -> str | None:
         """Возвращает текст чанка по его ID из указанной коллекции."""
         try:
-            collection = self._get_collection(collection_name)
-            result = collection.get(ids=[chunk_id], include=['documents'])
+            collection = await self._get_collection(collection_name)
+            if collection is None:
+                logger.warning(f"Коллекция '{collection_name}' не найдена.")
+                return None
+            with self._evict_on_not_found(collection_name):
+                result = await collection.get(ids=[chunk_id], include=['documents'])
             documents = result.get('documents', [])
             if documents:
                 return documents[0]
@@ -161,3 +445,26 @@ class ChromaDBManager:
         except Exception as e:
             logger.error(f"Ошибка при получении чанка с id '{chunk_id}' из коллекции '{collection_name}': {e}")
             return None
+
+
+class ChromaCollectionRetriever(BaseRetriever):
+    """
+    LangChain-ретривер поверх асинхронного ChromaDBManager. Синхронный invoke()
+    выполняет тот же поиск через ChromaDBManager.run_sync.
+    """
+
+    chroma_manager: Any
+    collection_name: str
+    k: int = 3
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self.chroma_manager.run_sync(
+            self.chroma_manager.similarity_search(self.collection_name, query, k=self.k)
+        )
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return await self.chroma_manager.similarity_search(self.collection_name, query, k=self.k)
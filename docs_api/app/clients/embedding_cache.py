@@ -0,0 +1,157 @@
+import hashlib
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.logger import logger
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Кэширующая обёртка над Embeddings для эмбеддингов запросов.
+
+    Ключ — (модель, нормализованный текст), поэтому смена EMBEDDING_MODEL
+    никогда не отдаёт старые векторы. Нормализация используется только для ключа:
+    в модель уходит исходный текст запроса. Первый уровень — LRU в памяти процесса,
+    второй (опционально) — Redis, общий для всех воркеров. Оба уровня с TTL.
+    Redis-клиент асинхронный, поэтому синхронный embed_query использует только LRU.
+    Эмбеддинги документов не кэшируются и проходят в исходный клиент напрямую.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        max_size: int,
+        ttl_seconds: int,
+        redis_url: str | None = None,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._redis: Redis | None = Redis.from_url(redis_url) if redis_url else None
+
+        self._memory: OrderedDict[str, tuple[float, List[float]]] = OrderedDict()
+
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    def _key(self, normalized_text: str) -> str:
+        digest = hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+        return f"emb:query:{self.model_name}:{digest}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Синхронный путь: только LRU в памяти, без Redis."""
+        normalized = self._normalize(text)
+        key = self._key(normalized)
+
+        vector = self._memory_get(key)
+        if vector is not None:
+            self.memory_hits += 1
+            return vector
+
+        self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._memory_set(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        normalized = self._normalize(text)
+        key = self._key(normalized)
+
+        vector = self._memory_get(key)
+        if vector is not None:
+            self.memory_hits += 1
+            return vector
+
+        vector = await self._redis_get(key)
+        if vector is not None:
+            self.redis_hits += 1
+            self._memory_set(key, vector)
+            return vector
+
+        self.misses += 1
+        vector = await self.embeddings.aembed_query(text)
+        self._memory_set(key, vector)
+        await self._redis_set(key, vector)
+        return vector
+
+    def stats(self) -> dict:
+        requests = self.memory_hits + self.redis_hits + self.misses
+        return {
+            "model_name": self.model_name,
+            "size": len(self._memory),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "redis_enabled": self._redis is not None,
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.redis_hits) / requests if requests else 0.0,
+            "redis_errors": self.redis_errors,
+        }
+
+    async def aclose(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+        await self.embeddings.aclose()
+
+    def _memory_get(self, key: str) -> List[float] | None:
+        cached = self._memory.get(key)
+        if cached is None:
+            return None
+
+        expires_at, vector = cached
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+
+        self._memory.move_to_end(key)
+        return vector
+
+    def _memory_set(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = (time.monotonic() + self.ttl_seconds, vector)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    async def _redis_get(self, key: str) -> List[float] | None:
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(key)
+        except RedisError as e:
+            self.redis_errors += 1
+            logger.warning(f"Кэш эмбеддингов: ошибка чтения из Redis: {e}")
+            return None
+        if raw is None:
+            return None
+        return array("f", raw).tolist()
+
+    async def _redis_set(self, key: str, vector: List[float]) -> None:
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(key, array("f", vector).tobytes(), ex=self.ttl_seconds)
+        except RedisError as e:
+            self.redis_errors += 1
+            logger.warning(f"Кэш эмбеддингов: ошибка записи в Redis: {e}")
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from app.logger import logger
+
+
+class StoredEmbeddings(Embeddings):
+    """
+    Обёртка над Embeddings с постоянным хранилищем эмбеддингов документов в SQLite.
+
+    Ключ — (модель, sha256 текста чанка): при повторной загрузке документа или
+    восстановлении коллекции в Chroma считаются только ранее не встречавшиеся чанки.
+    Эмбеддинги запросов не сохраняются и проходят в исходный клиент напрямую.
+    """
+
+    _QUERY_BATCH = 500
+
+    def __init__(self, embeddings: Embeddings, model_name: str, path: str):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [self._hash(text) for text in texts]
+        stored = self._get_many(hashes)
+        missing = self._collect_missing(texts, hashes, stored)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            self._store_new(missing, vectors, stored)
+        return [stored[h] for h in hashes]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [self._hash(text) for text in texts]
+        stored = await asyncio.to_thread(self._get_many, hashes)
+        missing = self._collect_missing(texts, hashes, stored)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            await asyncio.to_thread(self._store_new, missing, vectors, stored)
+        return [stored[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        with self._lock:
+            (stored,) = self._conn.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,)
+            ).fetchone()
+        return {
+            "model_name": self.model_name,
+            "stored": stored,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+        }
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._conn.close()
+        await self.embeddings.aclose()
+
+    def _collect_missing(
+        self,
+        texts: List[str],
+        hashes: List[str],
+        stored: dict[str, List[float]],
+    ) -> dict[str, str]:
+        """Уникальные тексты без сохранённого эмбеддинга: hash -> text."""
+        missing: dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in stored:
+                missing.setdefault(text_hash, text)
+
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        if stored:
+            logger.info(
+                f"Хранилище эмбеддингов: {len(texts) - len(missing)} из {len(texts)} чанков уже посчитаны"
+            )
+        return missing
+
+    def _get_many(self, hashes: List[str]) -> dict[str, List[float]]:
+        unique = list(dict.fromkeys(hashes))
+        found: dict[str, List[float]] = {}
+        with self._lock:
+            for start in range(0, len(unique), self._QUERY_BATCH):
+                batch = unique[start:start + self._QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    (self.model_name, *batch),
+                )
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+        return found
+
+    def _store_new(
+        self,
+        missing: dict[str, str],
+        vectors: List[List[float]],
+        stored: dict[str, List[float]],
+    ) -> None:
+        rows = []
+        for text_hash, vector in zip(missing.keys(), vectors):
+            stored[text_hash] = vector
+            rows.append((self.model_name, text_hash, array("f", vector).tobytes()))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
@@ -1,4 +1,6 @@
 import io
+import hashlib
+from typing import Iterator
 from minio import Minio
 from minio.error import S3Error
 
@@ -15,14 +17,20 @@ class MinioClient():
             secure=settings.MINIO_SECURE,
         )
         self.bucket_name = settings.MINIO_BUCKET_NAME
+        self.cache_bucket_name = settings.MINIO_PARSE_CACHE_BUCKET
         self.root_path = settings.MINIO_ROOT_PATH.strip("/")
 
+        self._ensure_bucket(self.bucket_name)
+        if settings.PARSE_CACHE_ENABLED:
+            self._ensure_bucket(self.cache_bucket_name)
+
+    def _ensure_bucket(self, bucket_name: str) -> None:
         try:
-            if not self.client.bucket_exists(self.bucket_name):
-                self.client.make_bucket(self.bucket_name)
-                logger.info(f"Bucket '{self.bucket_name}' создан в MinIO")
+            if not self.client.bucket_exists(bucket_name):
+                self.client.make_bucket(bucket_name)
+                logger.info(f"Bucket '{bucket_name}' создан в MinIO")
             else:
-                logger.info(f"Bucket '{self.bucket_name}' уже существует в MinIO")
+                logger.info(f"Bucket '{bucket_name}' уже существует в MinIO")
         except S3Error as e:
             logger.exception(f"Ошибка инициализации MinIO bucket: {e}")
             raise
@@ -46,3 +54,62 @@ class MinioClient():
         finally:
             response.close()
             response.release_conn()
+
+    def iter_document(self, object_name: str, chunk_size: int = settings.MINIO_READ_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Потоково читает документ из MinIO частями по chunk_size байт.
+        В памяти одновременно находится не больше одной части, соединение
+        освобождается после полного чтения или закрытия генератора.
+        """
+        object_name = self._get_object_name(object_name)
+        try:
+            response = self.client.get_object(bucket_name=self.bucket_name, object_name=object_name)
+        except S3Error as e:
+            logger.error(f"Ошибка получения {object_name} из MinIO: {e}")
+            raise
+
+        try:
+            total = 0
+            for data in response.stream(chunk_size):
+                total += len(data)
+                yield data
+            logger.info(f"Файл успешно прочитан из MinIO: {object_name} ({total} байт)")
+        finally:
+            response.close()
+            response.release_conn()
+
+    def document_sha256(self, object_name: str) -> str:
+        """Считает sha256 документа, читая его из MinIO потоком."""
+        sha256 = hashlib.sha256()
+        for data in self.iter_document(object_name):
+            sha256.update(data)
+        return sha256.hexdigest()
+
+    def get_cache_object(self, object_name: str) -> bytes | None:
+        """Возвращает объект из bucket кэша или None, если его нет."""
+        try:
+            response = self.client.get_object(bucket_name=self.cache_bucket_name, object_name=object_name)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return None
+            logger.error(f"Ошибка получения {object_name} из кэша MinIO: {e}")
+            raise
+
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def put_cache_object(self, object_name: str, data: bytes, content_type: str) -> None:
+        try:
+            self.client.put_object(
+                bucket_name=self.cache_bucket_name,
+                object_name=object_name,
+                data=io.BytesIO(data),
+                length=len(data),
+                content_type=content_type,
+            )
+        except S3Error as e:
+            logger.error(f"Ошибка записи {object_name} в кэш MinIO: {e}")
+            raise
@@ -1,8 +1,10 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from langchain_core.language_models.llms import LLM
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+from langchain_core.callbacks.manager import CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
 from langchain_core.embeddings import Embeddings
 
 from app.config import settings
@@ -16,10 +18,12 @@ class CustomLLM(LLM):
     Attributes:
         model_name (str): Название модели для использования
         client (OpenAI | None): Клиент OpenAI API
+        async_client (AsyncOpenAI | None): Асинхронный клиент OpenAI API
     """
 
     model_name: str
     client: OpenAI | None
+    async_client: AsyncOpenAI | None
 
     def __init__(self):
         """
@@ -30,12 +34,16 @@ class CustomLLM(LLM):
             model_name (str): Название модели
             api_key (str): Секретный ключ openai_api
         """
-        super().__init__(model_name=settings.LLM_MODEL, client=None)
+        super().__init__(model_name=settings.LLM_MODEL, client=None, async_client=None)
         self.model_name = settings.LLM_MODEL
         self.client = OpenAI(
             base_url=settings.OPENAI_API_URL,   
             api_key=settings.LLM_API_KEY,
         )
+        self.async_client = AsyncOpenAI(
+            base_url=settings.OPENAI_API_URL,
+            api_key=settings.LLM_API_KEY,
+        )
 
     def _call(
         self,
@@ -45,6 +53,15 @@ class CustomLLM(LLM):
         **kwargs: Any,
     ) -> str:
         return self.get_response_from_server(prompt)
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        return await self.aget_response_from_server(prompt)
     
     def get_response_from_server(self, prompt: str) -> str:
         # logger.info(f'ПРОМПТ: {prompt}')
@@ -61,6 +78,45 @@ class CustomLLM(LLM):
             logger.exception(f"Error in _get_response_from_server: {e}")
             raise
 
+    async def aget_response_from_server(self, prompt: str) -> str:
+        try:
+            completion = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.01,
+                max_completion_tokens=2000,
+            )
+            return completion.choices[0].message.content
+
+        except Exception as e:
+            logger.exception(f"Error in aget_response_from_server: {e}")
+            raise
+
+    async def astream_response_from_server(self, prompt: str) -> AsyncIterator[str]:
+        """Стримит ответ модели по мере генерации, отдавая текстовые дельты."""
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.01,
+                max_completion_tokens=2000,
+                stream=True,
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+        except Exception as e:
+            logger.exception(f"Error in astream_response_from_server: {e}")
+            raise
+
+    async def aclose(self) -> None:
+        self.client.close()
+        await self.async_client.close()
+
     @property
     def _identifying_params(self) -> Dict[str, Any]:
         return {
@@ -73,22 +129,98 @@ class CustomLLM(LLM):
 
 
 class CustomOllamaEmbeddings(Embeddings):
+    """
+    Эмбеддинги через OpenAI-совместимый API.
+
+    Документы отправляются батчами по EMBEDDING_BATCH_SIZE текстов, в async-режиме —
+    не более EMBEDDING_MAX_CONCURRENCY батчей одновременно. Порядок векторов
+    совпадает с порядком входных текстов. Латентность батчей логируется и
+    накапливается в batch_stats().
+    """
+
     def __init__(self):
         self.model_name = settings.EMBEDDING_MODEL
+        self.batch_size = settings.EMBEDDING_BATCH_SIZE
+        self.max_concurrency = settings.EMBEDDING_MAX_CONCURRENCY
         self.client = OpenAI(
             base_url=settings.OPENAI_API_URL,
             api_key=settings.LLM_API_KEY,
         )
+        self.async_client = AsyncOpenAI(
+            base_url=settings.OPENAI_API_URL,
+            api_key=settings.LLM_API_KEY,
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.batches = 0
+        self.batch_texts = 0
+        self.batch_seconds_total = 0.0
+        self.batch_seconds_max = 0.0
+        self.batch_seconds_last = 0.0
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        return self._get_embeddings(texts)
+        vectors: List[List[float]] = []
+        for batch in self._batches(texts):
+            started = time.perf_counter()
+            vectors.extend(self._get_embeddings(batch))
+            self._record_batch(len(batch), time.perf_counter() - started)
+        return vectors
 
     def embed_query(self, text: str) -> List[float]:
         return self._get_embeddings([text])[0]
 
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        batches = self._batches(texts)
+        results = await asyncio.gather(*(self._aembed_batch(batch) for batch in batches))
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self._aget_embeddings([text]))[0]
+
+    def batch_stats(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "batch_size": self.batch_size,
+            "max_concurrency": self.max_concurrency,
+            "batches": self.batches,
+            "texts": self.batch_texts,
+            "avg_batch_seconds": self.batch_seconds_total / self.batches if self.batches else 0.0,
+            "max_batch_seconds": self.batch_seconds_max,
+            "last_batch_seconds": self.batch_seconds_last,
+        }
+
+    async def aclose(self) -> None:
+        self.client.close()
+        await self.async_client.close()
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    async def _aembed_batch(self, batch: List[str]) -> List[List[float]]:
+        async with self._semaphore:
+            started = time.perf_counter()
+            vectors = await self._aget_embeddings(batch)
+            self._record_batch(len(batch), time.perf_counter() - started)
+            return vectors
+
+    def _record_batch(self, size: int, seconds: float) -> None:
+        self.batches += 1
+        self.batch_texts += size
+        self.batch_seconds_total += seconds
+        self.batch_seconds_max = max(self.batch_seconds_max, seconds)
+        self.batch_seconds_last = seconds
+        logger.info(f"Эмбеддинги: батч из {size} текстов за {seconds:.3f} с")
+
     def _get_embeddings(self, input_texts: List[str]) -> List[List[float]]:
         response = self.client.embeddings.create(
             model=self.model_name,
             input=input_texts
         )
         return [e.embedding for e in response.data]
+
+    async def _aget_embeddings(self, input_texts: List[str]) -> List[List[float]]:
+        response = await self.async_client.embeddings.create(
+            model=self.model_name,
+            input=input_texts
+        )
+        return [e.embedding for e in response.data]
@@ -10,6 +10,8 @@ class Settings(BaseSettings):
     LLM_API_KEY: str
     LLM_MODEL: str
     EMBEDDING_MODEL: str
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_MAX_CONCURRENCY: int = 4
 
     # ChromaDB
     CHROMADB_HOST: str
@@ -18,6 +20,14 @@ class Settings(BaseSettings):
     CHROMADB_PORT: int  
     CHROMA_DOCS_COLLECTION_NAME: str  
     PERSIST_DIRECTORY: str
+    CHROMA_WRITE_BATCH_SIZE: int = 256
+    CHROMA_WRITE_MAX_ATTEMPTS: int = 5
+    CHROMA_WRITE_BACKOFF_SECONDS: float = 0.5
+    CHROMA_READ_PAGE_SIZE: int = 1000
+    # Белый список полей метаданных чанка, сохраняемых в Chroma (типы — в metadata_schema)
+    CHROMA_METADATA_FIELDS: list[str] = [
+        "section", "source", "page_number", "element_type", "category_depth", "parent_id",
+    ]
 
     # Minio
     MINIO_ENDPOINT: str
@@ -26,6 +36,10 @@ class Settings(BaseSettings):
     MINIO_SECURE: bool = False
     MINIO_BUCKET_NAME: str
     MINIO_ROOT_PATH: str
+    MINIO_READ_CHUNK_SIZE: int = 1024 * 1024
+    # Отдельный bucket: backend удаляет из основного всё, чего нет в Postgres
+    MINIO_PARSE_CACHE_BUCKET: str = "parse-cache"
+    PARSE_CACHE_ENABLED: bool = True
 
     # Langfuse
     LANGFUSE_SECRET_KEY: str
@@ -44,5 +58,28 @@ class Settings(BaseSettings):
     MAX_CHARACTERS: int = 1500
     NEW_AFTER_N_CHARS: int = 1200
     COMBINE_UNDER_N_CHARS: int = 200
+    UNSTRUCTURED_API_TIMEOUT_SECONDS: float = 600.0
+    # api — unstructured API; local / auto (python-docx с откатом на API) — явное включение
+    DOCX_PARSER: str = "api"   # api | auto | local
+    DOCX_LOCAL_MAX_BYTES: int = 20 * 1024 * 1024
+    PARSE_SPOOL_MAX_MEMORY_BYTES: int = 8 * 1024 * 1024
+    PARSE_WORKERS: int = 2   # 0 — парсинг в потоках основного процесса
+    # Отладка: выгрузка чанков каждого документа в chunks.txt рабочего каталога
+    DEBUG_SAVE_CHUNKS: bool = False
+
+    # Query embedding cache
+    EMBEDDING_CACHE_MAX_SIZE: int = 10_000
+    EMBEDDING_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    EMBEDDING_CACHE_REDIS_URL: str | None = None
+
+    # Ingestion jobs
+    INGEST_MAX_CONCURRENCY: int = 2
+
+    # Chunk embedding store
+    EMBEDDING_STORE_PATH: str = "/app/data/embeddings.sqlite3"
+
+    # BM25 cache
+    BM25_CACHE_MAX_COLLECTIONS: int = 32
+    BM25_CACHE_MAX_CHUNKS: int = 200_000
 
 settings = Settings()
@@ -0,0 +1,8 @@
+from fastapi import Depends
+
+from app.rag.bm25_cache import BM25IndexCache
+from app.dependencies.resources import get_resources, AppResources
+
+
+def get_bm25_cache(resources: AppResources = Depends(get_resources)) -> BM25IndexCache:
+    return resources.bm25_cache
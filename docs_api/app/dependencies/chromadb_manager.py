@@ -1,7 +1,8 @@
-from app.clients.chromadb_client import ChromaDBManager
+from fastapi import Depends
 
+from app.clients.chromadb_client import ChromaDBManager
+from app.dependencies.resources import get_resources, AppResources
 
-chromadb_manager = ChromaDBManager()
 
-def get_chromadb_manager() -> ChromaDBManager:
-    return chromadb_manager
\ No newline at end of file
+def get_chromadb_manager(resources: AppResources = Depends(get_resources)) -> ChromaDBManager:
+    return resources.chromadb_manager
@@ -0,0 +1,8 @@
+from fastapi import Depends
+
+from app.documents.jobs import IngestionJobManager
+from app.dependencies.resources import get_resources, AppResources
+
+
+def get_ingestion_jobs(resources: AppResources = Depends(get_resources)) -> IngestionJobManager:
+    return resources.ingestion_jobs
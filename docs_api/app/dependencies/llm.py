@@ -0,0 +1,8 @@
+from fastapi import Depends
+
+from app.clients.openai_api_client import CustomLLM
+from app.dependencies.resources import get_resources, AppResources
+
+
+def get_llm(resources: AppResources = Depends(get_resources)) -> CustomLLM:
+    return resources.llm
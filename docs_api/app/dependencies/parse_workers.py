@@ -0,0 +1,8 @@
+from fastapi import Depends
+
+from app.documents.workers import ParseWorkerPool
+from app.dependencies.resources import get_resources, AppResources
+
+
+def get_parse_workers(resources: AppResources = Depends(get_resources)) -> ParseWorkerPool:
+    return resources.parse_workers
@@ -0,0 +1,7 @@
+from fastapi import Request
+
+from app.resources import AppResources
+
+
+def get_resources(request: Request) -> AppResources:
+    return request.app.state.resources
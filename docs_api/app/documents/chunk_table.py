@@ -0,0 +1,179 @@
+import json
+from array import array
+from typing import Iterable, Iterator, NamedTuple
+
+from app.documents.schemas import Chunk
+from app.documents.metadata_schema import chunk_metadata
+
+
+class ChunkRow(NamedTuple):
+    id: str
+    text: str
+    section: str | None
+    source: str | None
+    page_number: int | None
+    element_type: str | None
+    category_depth: int | None
+    parent_id: str | None
+    extra: dict | None
+
+
+class _StringPool:
+    """Словарное кодирование повторяющихся строк: код 0 — None."""
+
+    __slots__ = ("values", "_index")
+
+    def __init__(self):
+        self.values: list[str | None] = [None]
+        self._index: dict[str, int] = {}
+
+    def encode(self, value: str | None) -> int:
+        if value is None:
+            return 0
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._index[value] = code
+        return code
+
+    def __getstate__(self):
+        return self.values
+
+    def __setstate__(self, values):
+        self.values = values
+        self._index = {value: code for code, value in enumerate(values) if value is not None}
+
+
+class ChunkTable:
+    """
+    Компактное колоночное хранилище чанков вместо списка pydantic-моделей Chunk.
+
+    Тексты и IDs лежат в двух непрерывных UTF-8 буферах со смещениями,
+    номера страниц и глубина заголовка — в типизированных массивах,
+    section / source / element_type / parent_id — словарно закодированы.
+    Метаданные хранятся уже спроецированными по схеме (см. metadata_schema):
+    поля ChunkRow — в колонках, остальные поля белого списка — словарно
+    закодированным JSON в колонке extra.
+    Таблица сериализуется pickle без поэлементных объектов, поэтому дёшево
+    передаётся между процессами пула парсинга.
+    """
+
+    __slots__ = (
+        "_ids", "_id_offsets", "_texts", "_text_offsets",
+        "_page_numbers", "_category_depths",
+        "_sections", "_section_codes",
+        "_sources", "_source_codes",
+        "_element_types", "_element_type_codes",
+        "_parent_ids", "_parent_id_codes",
+        "_extras", "_extra_codes",
+    )
+
+    def __init__(self):
+        self._ids = bytearray()
+        self._id_offsets = array("Q", [0])
+        self._texts = bytearray()
+        self._text_offsets = array("Q", [0])
+        # -1 — значение отсутствует
+        self._page_numbers = array("i")
+        self._category_depths = array("b")
+        self._sections = _StringPool()
+        self._section_codes = array("I")
+        self._sources = _StringPool()
+        self._source_codes = array("I")
+        self._element_types = _StringPool()
+        self._element_type_codes = array("H")
+        self._parent_ids = _StringPool()
+        self._parent_id_codes = array("I")
+        self._extras = _StringPool()
+        self._extra_codes = array("I")
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Chunk], fields: tuple[str, ...] | None = None) -> "ChunkTable":
+        """Строит таблицу из чанков, проецируя их метаданные по белому списку полей."""
+        table = cls()
+        for chunk in chunks:
+            table.append(chunk.id, chunk.text, chunk_metadata(chunk, fields))
+        return table
+
+    def append(self, id: str, text: str, metadata: dict | None = None) -> None:
+        """Добавляет чанк; metadata должны быть уже спроецированы (project_metadata)."""
+        metadata = dict(metadata or {})
+        page_number = metadata.pop("page_number", None)
+        category_depth = metadata.pop("category_depth", None)
+
+        self._ids += id.encode("utf-8")
+        self._id_offsets.append(len(self._ids))
+        self._texts += text.encode("utf-8")
+        self._text_offsets.append(len(self._texts))
+        self._page_numbers.append(page_number if isinstance(page_number, int) else -1)
+        self._category_depths.append(category_depth if isinstance(category_depth, int) else -1)
+        self._section_codes.append(self._sections.encode(metadata.pop("section", None)))
+        self._source_codes.append(self._sources.encode(metadata.pop("source", None)))
+        self._element_type_codes.append(self._element_types.encode(metadata.pop("element_type", None)))
+        self._parent_id_codes.append(self._parent_ids.encode(metadata.pop("parent_id", None)))
+        # Оставшиеся поля у чанков одного документа обычно совпадают (filename, filetype, languages)
+        extra = json.dumps(metadata, ensure_ascii=False, sort_keys=True) if metadata else None
+        self._extra_codes.append(self._extras.encode(extra))
+
+    def __len__(self) -> int:
+        return len(self._page_numbers)
+
+    def id(self, i: int) -> str:
+        return self._ids[self._id_offsets[i]:self._id_offsets[i + 1]].decode("utf-8")
+
+    def text(self, i: int) -> str:
+        return self._texts[self._text_offsets[i]:self._text_offsets[i + 1]].decode("utf-8")
+
+    def row(self, i: int) -> ChunkRow:
+        page_number = self._page_numbers[i]
+        category_depth = self._category_depths[i]
+        return ChunkRow(
+            id=self.id(i),
+            text=self.text(i),
+            section=self._sections.values[self._section_codes[i]],
+            source=self._sources.values[self._source_codes[i]],
+            page_number=page_number if page_number >= 0 else None,
+            element_type=self._element_types.values[self._element_type_codes[i]],
+            category_depth=category_depth if category_depth >= 0 else None,
+            parent_id=self._parent_ids.values[self._parent_id_codes[i]],
+            extra=self._extra(i),
+        )
+
+    def _extra(self, i: int) -> dict | None:
+        extra = self._extras.values[self._extra_codes[i]]
+        return json.loads(extra) if extra is not None else None
+
+    def __iter__(self) -> Iterator[ChunkRow]:
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def ids(self) -> list[str]:
+        return [self.id(i) for i in range(len(self))]
+
+    def texts(self) -> list[str]:
+        return [self.text(i) for i in range(len(self))]
+
+    def metadata(self, i: int) -> dict:
+        """Метаданные чанка для Chroma — в том виде, в каком они были добавлены."""
+        row = self.row(i)
+        metadata = {}
+        for key in ("section", "source", "page_number", "element_type", "category_depth", "parent_id"):
+            value = getattr(row, key)
+            if value is not None:
+                metadata[key] = value
+        if row.extra:
+            metadata.update(row.extra)
+        return metadata
+
+    def metadatas(self) -> list[dict]:
+        return [self.metadata(i) for i in range(len(self))]
+
+    def nbytes(self) -> int:
+        """Приблизительный объём данных таблицы в байтах (без пулов строк)."""
+        arrays = (
+            self._id_offsets, self._text_offsets, self._page_numbers, self._category_depths,
+            self._section_codes, self._source_codes, self._element_type_codes, self._parent_id_codes,
+            self._extra_codes,
+        )
+        return len(self._ids) + len(self._texts) + sum(a.itemsize * len(a) for a in arrays)
@@ -0,0 +1,120 @@
+"""
+Бенчмарк памяти: список Chunk / список словарей против ChunkTable,
+плюс индекс BM25Okapi, который кэш BM25 держит рядом с таблицей.
+
+Запуск внутри контейнера docs_api:
+    python -m app.documents.chunk_table_benchmark --chunks 10000 --text-size 1000
+"""
+import argparse
+import gc
+import pickle
+import random
+import tracemalloc
+from typing import Any, Callable
+
+from rank_bm25 import BM25Okapi
+
+from app.documents.chunk_table import ChunkTable
+from app.documents.schemas import Chunk
+
+
+_WORDS = "документ раздел система настройка параметр пользователь сервер запрос ответ модуль".split()
+
+
+def _make_chunk(i: int, text_size: int, rng: random.Random) -> Chunk:
+    words: list[str] = []
+    length = 0
+    while length < text_size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+
+    return Chunk(
+        id=Chunk.create_id(),
+        text=" ".join(words),
+        section=f"Раздел {i // 20}",
+        source="manual.docx",
+        page_number=i // 5 + 1,
+        element_type="CompositeElement",
+        metadata={
+            "filename": "manual.docx",
+            "filetype": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            "languages": ["rus"],
+            "page_number": i // 5 + 1,
+            "category_depth": 1,
+            "parent_id": f"{i // 20:032x}",
+        },
+    )
+
+
+def _measure(build: Callable[[], Any]) -> tuple[Any, int]:
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current
+
+
+def run(chunk_count: int, text_size: int, seed: int = 0) -> list[tuple[str, int, int]]:
+    rng = random.Random(seed)
+    source = [_make_chunk(i, text_size, rng) for i in range(chunk_count)]
+
+    # Представления строятся из копий строк, чтобы не делить память с source
+    def build_models() -> list[Chunk]:
+        return [Chunk(**chunk.model_dump()) for chunk in pickle.loads(pickle.dumps(source))]
+
+    def build_dicts() -> list[dict]:
+        return [
+            {
+                "text": chunk.text,
+                "metadata": {
+                    "section": chunk.section,
+                    "source": chunk.source,
+                    "page_number": chunk.page_number,
+                    "element_type": chunk.element_type,
+                    **(chunk.metadata or {}),
+                },
+                "id": chunk.id,
+                "collection": "benchmark",
+            }
+            for chunk in pickle.loads(pickle.dumps(source))
+        ]
+
+    def build_table() -> ChunkTable:
+        return ChunkTable.from_chunks(pickle.loads(pickle.dumps(source)))
+
+    rows = []
+    for name, build in (("list[Chunk]", build_models), ("list[dict]", build_dicts), ("ChunkTable", build_table)):
+        value, size = _measure(build)
+        rows.append((name, size, len(pickle.dumps(value))))
+        del value
+
+    # Индекс BM25 (doc_freqs — словарь на каждый чанк) обычно больше самой таблицы
+    table = build_table()
+    index, size = _measure(lambda: BM25Okapi(table.text(i).split() for i in range(len(table))))
+    rows.append(("BM25Okapi", size, len(pickle.dumps(index))))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=10_000)
+    parser.add_argument("--text-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = run(args.chunks, args.text_size)
+    baseline = rows[0][1]
+    table_size = next(size for name, size, _ in rows if name == "ChunkTable")
+    index_size = next(size for name, size, _ in rows if name == "BM25Okapi")
+    texts_mb = args.chunks * args.text_size / 1024 / 1024
+
+    print(f"{args.chunks} чанков по ~{args.text_size} символов (~{texts_mb:.1f}M символов текста)")
+    print(f"{'представление':<14} {'память, MB':>11} {'pickle, MB':>11} {'от list[Chunk]':>15}")
+    for name, size, pickled in rows:
+        print(f"{name:<14} {size / 1024 / 1024:>11.1f} {pickled / 1024 / 1024:>11.1f} {size / baseline:>14.0%}")
+    print(f"Кэш BM25 (ChunkTable + BM25Okapi): {(table_size + index_size) / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+from app.documents.schemas import IngestionJob, IngestionJobStatus
+from app.logger import logger
+
+
+T = TypeVar("T")
+
+
+class IngestionJobManager:
+    """
+    Фоновые задачи индексации документов.
+
+    submit() сразу возвращает задачу в статусе queued; сама обработка идёт в
+    фоне, одновременно выполняется не больше max_concurrency задач. Задачи
+    одного документа выполняются строго по очереди: индексация, переиндексация
+    и повторная индексация от синхронизации не читают старые IDs чанков
+    одновременно. Удаление документа (run_exclusive) отменяет его задачи и
+    выполняется под той же блокировкой, поэтому задача индексации не пересоздаёт
+    удалённую коллекцию. Состояние хранится в памяти процесса, завершённые задачи
+    вытесняются сверх max_finished.
+    """
+
+    def __init__(self, max_concurrency: int, max_finished: int = 1000):
+        self.max_concurrency = max_concurrency
+        self.max_finished = max_finished
+
+        self._jobs: OrderedDict[uuid.UUID, IngestionJob] = OrderedDict()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        # Блокировка и число задач документа; запись удаляется вместе с последней задачей
+        self._document_locks: dict[uuid.UUID, tuple[asyncio.Lock, int]] = {}
+        self._document_tasks: dict[uuid.UUID, set[asyncio.Task]] = {}
+
+    def submit(
+        self,
+        document_id: uuid.UUID,
+        run: Callable[[IngestionJob], Awaitable[None]],
+    ) -> IngestionJob:
+        job = IngestionJob(document_id=document_id)
+        self._jobs[job.job_id] = job
+
+        task = asyncio.create_task(self._run(job, run))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        document_tasks = self._document_tasks.setdefault(document_id, set())
+        document_tasks.add(task)
+        task.add_done_callback(lambda done: self._forget_document_task(document_id, done))
+
+        logger.info(f"Задача индексации {job.job_id} для документа {document_id} поставлена в очередь")
+        return job
+
+    def get(self, job_id: uuid.UUID) -> IngestionJob | None:
+        return self._jobs.get(job_id)
+
+    async def run_exclusive(self, document_id: uuid.UUID, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Отменяет поставленные и выполняющиеся задачи документа и выполняет func
+        под блокировкой документа (используется для удаления коллекции).
+        """
+        tasks = list(self._document_tasks.get(document_id, ()))
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(f"Отменено задач индексации документа {document_id}: {len(tasks)}")
+
+        async with self._document_lock(document_id):
+            return await func()
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, job: IngestionJob, run: Callable[[IngestionJob], Awaitable[None]]) -> None:
+        # Сначала очередь документа, затем общий лимит: ожидание не занимает слот семафора
+        try:
+            async with self._document_lock(job.document_id), self._semaphore:
+                try:
+                    await run(job)
+                    job.status = IngestionJobStatus.done
+                    logger.info(f"Задача индексации {job.job_id} завершена: {job.chunk_count} чанков, {job.timings}")
+                except Exception as e:
+                    job.status = IngestionJobStatus.failed
+                    job.error = str(e) or repr(e)
+                    logger.error(f"Задача индексации {job.job_id} завершилась ошибкой: {job.error}")
+        except asyncio.CancelledError:
+            job.status = IngestionJobStatus.failed
+            job.error = "Задача отменена"
+            logger.warning(f"Задача индексации {job.job_id} отменена")
+            raise
+        finally:
+            job.finished_at = datetime.now()
+            self._trim()
+
+    @asynccontextmanager
+    async def _document_lock(self, document_id: uuid.UUID) -> AsyncIterator[None]:
+        lock, count = self._document_locks.get(document_id, (asyncio.Lock(), 0))
+        self._document_locks[document_id] = (lock, count + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, count = self._document_locks[document_id]
+            if count == 1:
+                del self._document_locks[document_id]
+            else:
+                self._document_locks[document_id] = (lock, count - 1)
+
+    def _forget_document_task(self, document_id: uuid.UUID, task: asyncio.Task) -> None:
+        document_tasks = self._document_tasks.get(document_id)
+        if document_tasks is not None:
+            document_tasks.discard(task)
+            if not document_tasks:
+                del self._document_tasks[document_id]
+
+    def _trim(self) -> None:
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in (IngestionJobStatus.done, IngestionJobStatus.failed)
+        ]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
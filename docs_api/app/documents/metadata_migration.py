@@ -0,0 +1,60 @@
+"""
+Проекция метаданных уже записанных коллекций Chroma по схеме CHROMA_METADATA_FIELDS
+и отчёт о сэкономленном объёме по каждой коллекции.
+
+Запуск внутри контейнера docs_api:
+    python -m app.documents.metadata_migration              # только отчёт (dry run)
+    python -m app.documents.metadata_migration --apply      # перезаписать метаданные
+    python -m app.documents.metadata_migration --apply <collection_id> ...
+"""
+import argparse
+import asyncio
+
+from app.clients.chromadb_client import ChromaDBManager
+from app.documents.metadata_schema import metadata_fields
+
+
+def format_report(rows: list[dict], applied: bool) -> str:
+    header = f"{'collection':<38} {'chunks':>8} {'changed':>8} {'before KB':>10} {'after KB':>10} {'saved':>7}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        saved = row["bytes_saved"] / row["bytes_before"] if row["bytes_before"] else 0.0
+        lines.append(
+            f"{row['collection'][:38]:<38} {row['chunks']:>8} {row['changed']:>8} "
+            f"{row['bytes_before'] / 1024:>10.1f} {row['bytes_after'] / 1024:>10.1f} {saved:>7.1%}"
+        )
+
+    if rows:
+        before = sum(row["bytes_before"] for row in rows)
+        saved = sum(row["bytes_saved"] for row in rows)
+        lines.append("-" * len(header))
+        lines.append(
+            f"Итого: {len(rows)} коллекций, метаданные {before / 1024:.1f} KB -> {(before - saved) / 1024:.1f} KB "
+            f"({'перезаписано' if applied else 'dry run, ничего не изменено'})"
+        )
+    return "\n".join(lines)
+
+
+async def migrate(collections: list[str], apply: bool) -> list[dict]:
+    chromadb_manager = ChromaDBManager()
+    collections = collections or await chromadb_manager.get_list_collections()
+    fields = metadata_fields()
+    return [
+        await chromadb_manager.project_collection_metadata(name, fields=fields, apply=apply)
+        for name in collections
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("collections", nargs="*", help="коллекции (по умолчанию — все)")
+    parser.add_argument("--apply", action="store_true", help="перезаписать метаданные в Chroma")
+    args = parser.parse_args()
+
+    rows = asyncio.run(migrate(args.collections, args.apply))
+    print(f"Схема метаданных: {', '.join(metadata_fields())}")
+    print(format_report(rows, args.apply))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import hashlib
+import json
+from typing import Any
+
+from app.documents.schemas import Chunk
+from app.config import settings
+
+
+# Известные поля метаданных и тип, к которому они приводятся перед записью в Chroma.
+# Поля вне этого словаря, указанные в CHROMA_METADATA_FIELDS, приводятся к str.
+METADATA_FIELD_TYPES: dict[str, type] = {
+    "section": str,
+    "source": str,
+    "page_number": int,
+    "element_type": str,
+    "category_depth": int,
+    "parent_id": str,
+    "filename": str,
+    "filetype": str,
+    "languages": str,
+    "page_name": str,
+    "last_modified": str,
+    "is_continuation": bool,
+}
+
+
+# Служебное поле записи: чем и по какой схеме записан чанк (см. index_version)
+INDEX_VERSION_KEY = "index_version"
+
+
+def metadata_fields() -> tuple[str, ...]:
+    return tuple(settings.CHROMA_METADATA_FIELDS)
+
+
+def index_version() -> str:
+    """
+    Версия записи чанка в Chroma: модель эмбеддингов и схема метаданных.
+    Запись с другой версией считается устаревшей и перезаписывается при индексации.
+    """
+    schema_hash = hashlib.sha256(",".join(metadata_fields()).encode("utf-8")).hexdigest()[:12]
+    return f"{settings.EMBEDDING_MODEL}:{schema_hash}"
+
+
+def _coerce(value: Any, field_type: type) -> str | int | float | bool | None:
+    if value is None:
+        return None
+    if field_type is str:
+        if isinstance(value, (list, tuple)):
+            # Например, languages: ["rus", "eng"] -> "rus,eng"
+            items = [str(item) for item in value if isinstance(item, (str, int, float))]
+            return ",".join(items) or None
+        if isinstance(value, (str, int, float, bool)):
+            return str(value)
+        return None
+    if field_type is int:
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+            return int(value)
+        return None
+    if field_type is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.lower() in ("true", "false"):
+            return value.lower() == "true"
+        return None
+    return None
+
+
+def project_metadata(metadata: dict | None, fields: tuple[str, ...] | None = None) -> dict:
+    """
+    Оставляет в метаданных только поля из белого списка и приводит их к типам схемы.
+    Поля, которые не удалось привести (вложенные структуры, координаты и т.п.), отбрасываются.
+    """
+    fields = fields if fields is not None else metadata_fields()
+    metadata = metadata or {}
+    projected = {}
+    for field in fields:
+        value = _coerce(metadata.get(field), METADATA_FIELD_TYPES.get(field, str))
+        if value is not None:
+            projected[field] = value
+    # Служебное поле не входит в белый список, но сохраняется как есть
+    if isinstance(metadata.get(INDEX_VERSION_KEY), str):
+        projected[INDEX_VERSION_KEY] = metadata[INDEX_VERSION_KEY]
+    return projected
+
+
+def chunk_metadata(chunk: Chunk, fields: tuple[str, ...] | None = None) -> dict:
+    """Метаданные чанка для Chroma: поля Chunk поверх метаданных unstructured, по схеме."""
+    metadata = {
+        **(chunk.metadata or {}),
+        "section": chunk.section or "Unknown",
+        "source": chunk.source or "N/A",
+        "page_number": chunk.page_number,
+        "element_type": chunk.element_type,
+    }
+    return project_metadata(metadata, fields)
+
+
+def metadata_size(metadata: dict | None) -> int:
+    """Размер метаданных в байтах JSON — так их хранит и передаёт Chroma."""
+    if not metadata:
+        return 0
+    return len(json.dumps(metadata, ensure_ascii=False).encode("utf-8"))
@@ -0,0 +1,50 @@
+import gzip
+import json
+
+from app.clients.minio_client import MinioClient
+from app.config import settings
+from app.logger import logger
+
+
+class ParseCache:
+    """
+    Кэш результатов парсинга в MinIO. Хранятся сырые элементы unstructured
+    до чанкинга, поэтому ключ — sha256 исходного файла, режим DOCX_PARSER и стратегия парсинга,
+    а параметры чанкинга можно менять без повторного обращения к unstructured API.
+    Значение — gzip-сжатый JSON.
+    """
+
+    FORMAT_VERSION = 3
+
+    def __init__(self, minio_client: MinioClient):
+        self.minio_client = minio_client
+
+    def object_name(self, sha256: str) -> str:
+        return f"{sha256}/v{self.FORMAT_VERSION}-{settings.DOCX_PARSER}-{settings.UNSTRUCTURED_STRATEGY}.json.gz"
+
+    def get(self, sha256: str) -> list[dict] | None:
+        object_name = self.object_name(sha256)
+        try:
+            data = self.minio_client.get_cache_object(object_name)
+        except Exception as e:
+            logger.warning(f"Кэш парсинга недоступен ({object_name}): {e}")
+            return None
+
+        if data is None:
+            return None
+
+        try:
+            return json.loads(gzip.decompress(data))
+        except Exception as e:
+            logger.warning(f"Повреждённая запись кэша парсинга {object_name}: {e}")
+            return None
+
+    def put(self, sha256: str, elements: list[dict]) -> None:
+        """Сохраняет элементы в формате elements_to_dicts."""
+        object_name = self.object_name(sha256)
+        data = gzip.compress(json.dumps(elements, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        try:
+            self.minio_client.put_cache_object(object_name, data, content_type="application/gzip")
+            logger.info(f"Результат парсинга сохранён в кэш: {object_name} ({len(data)} байт)")
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить результат парсинга в кэш ({object_name}): {e}")
@@ -1,8 +1,25 @@
-import io
-from unstructured.partition.api import partition_via_api
-from unstructured.documents.elements import Element
+import html
+import uuid
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, Literal
+import docx
+import httpx
+from docx.document import Document as DocxDocument
+from docx.table import Table as DocxTable
+from docx.text.paragraph import Paragraph
+from unstructured.chunking.basic import chunk_elements
+from unstructured.chunking.title import chunk_by_title
+from unstructured.documents.elements import (
+    Element,
+    ElementMetadata,
+    ListItem,
+    NarrativeText,
+    Table,
+    Title,
+)
+from unstructured.staging.base import elements_from_dicts
 
-from app.documents.schemas import Chunk
+from app.documents.schemas import Chunk, ChunkingParams
 from app.logger import logger
 from app.config import settings
 
@@ -42,45 +59,314 @@ def _element_to_chunk(el: Element) -> Chunk:
     )
 
 
-def parse_docx_to_chunks(file_bytes: bytes, metadata_filename: str | None = "uploaded.docx") -> list[Chunk]:
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def _multipart_body(
+    boundary: str,
+    fields: dict[str, str],
+    file_chunks: Iterable[bytes],
+    filename: str,
+) -> Iterator[bytes]:
     """
-    Основная функция: принимает байты .docx и возвращает список Chunk.
-    :param file_bytes: байты документа (как из MinIO)
-    :param metadata_filename: имя файла, которое будет записано в метаданные (обязательно при передаче file)
-    :return: список Chunk
+    Собирает тело multipart/form-data на лету: поля формы, затем файл
+    по частям из file_chunks. Файл не склеивается в памяти целиком.
     """
-    if not isinstance(file_bytes, (bytes, bytearray)):
-        raise TypeError("file_bytes должен быть bytes или bytearray")
+    for name, value in fields.items():
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f"{value}\r\n"
+        ).encode()
 
-    try:
-        elements = partition_via_api(
-            file=file_bytes,
-            metadata_filename=metadata_filename,
-            api_url=settings.unstructured_api_url,
-            # chunking params
-            chunking_strategy=settings.CHUNKING_STRATEGY,
-            strategy=settings.UNSTRUCTURED_STRATEGY,
-            max_characters=settings.MAX_CHARACTERS,
-            new_after_n_chars=settings.NEW_AFTER_N_CHARS,
-            combine_under_n_chars=settings.COMBINE_UNDER_N_CHARS,
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="files"; filename="{filename}"\r\n'
+        f"Content-Type: {DOCX_CONTENT_TYPE}\r\n\r\n"
+    ).encode()
+    yield from file_chunks
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def partition_stream_via_api(file_chunks: Iterable[bytes], metadata_filename: str) -> list[Element]:
+    """
+    Отправляет документ в unstructured API потоковым multipart-запросом
+    (chunked transfer encoding) и возвращает сырые элементы без чанкинга:
+    разбиение на чанки выполняется локально, см. chunk_elements_locally.
+    """
+    boundary = uuid.uuid4().hex
+    fields = {"strategy": settings.UNSTRUCTURED_STRATEGY}
+
+    with httpx.Client(timeout=settings.UNSTRUCTURED_API_TIMEOUT_SECONDS) as client:
+        response = client.post(
+            settings.unstructured_api_url,
+            content=_multipart_body(boundary, fields, file_chunks, metadata_filename),
+            headers={
+                "Accept": "application/json",
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+            },
         )
-    except Exception as e:
-        logger.exception("Error while partitioning document via unstructured API: %s", e)
-        raise e
+        response.raise_for_status()
+
+    return elements_from_dicts(response.json())
+
+
+def default_chunking_params() -> ChunkingParams:
+    return ChunkingParams(
+        chunking_strategy=settings.CHUNKING_STRATEGY,
+        max_characters=settings.MAX_CHARACTERS,
+        new_after_n_chars=settings.NEW_AFTER_N_CHARS,
+        combine_under_n_chars=settings.COMBINE_UNDER_N_CHARS,
+    )
+
+
+def chunk_elements_locally(elements: list[Element], params: ChunkingParams | None = None) -> list[Element]:
+    """
+    Разбивает сырые элементы на чанки в процессе, теми же алгоритмами,
+    что и unstructured API (by_title / basic).
+    """
+    params = params or default_chunking_params()
+
+    if params.chunking_strategy == "by_title":
+        return chunk_by_title(
+            elements,
+            max_characters=params.max_characters,
+            new_after_n_chars=params.new_after_n_chars,
+            combine_text_under_n_chars=params.combine_under_n_chars,
+        )
+    return chunk_elements(
+        elements,
+        max_characters=params.max_characters,
+        new_after_n_chars=params.new_after_n_chars,
+    )
+
 
+def elements_to_chunks(elements: list[Element], document_id: uuid.UUID | None = None) -> list[Chunk]:
+    """
+    Преобразует чанки-элементы в Chunk. Если передан document_id, IDs чанков
+    детерминированы (Chunk.content_id), иначе случайны.
+    """
     chunks: list[Chunk] = []
     for el in elements:
         text = getattr(el, "text", None) or ""
         if not text.strip():
             continue
-        chunks.append(_element_to_chunk(el))
+        chunk = _element_to_chunk(el)
+        if document_id is not None:
+            chunk.id = Chunk.content_id(document_id, len(chunks), chunk.text)
+        chunks.append(chunk)
+    return chunks
+
+
+DocxParserBackend = Literal["local", "api"]
+
+# Содержимое, которое локальный обход не извлекает: картинки, OLE-объекты, надписи
+_COMPLEX_CONTENT_XPATH = ".//w:drawing | .//w:pict | .//w:object | .//w:txbxContent"
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _iter_file(fh: BinaryIO, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    fh.seek(0)
+    while data := fh.read(chunk_size):
+        yield data
+
+
+def _spool(file_chunks: Iterable[bytes]) -> tempfile.SpooledTemporaryFile:
+    """Складывает поток во временный файл: в памяти до порога, дальше на диске."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=settings.PARSE_SPOOL_MAX_MEMORY_BYTES)
+    for data in file_chunks:
+        spooled.write(data)
+    spooled.seek(0)
+    return spooled
+
+
+def _file_size(fh: BinaryIO) -> int:
+    fh.seek(0, 2)
+    size = fh.tell()
+    fh.seek(0)
+    return size
+
+
+def choose_docx_parser(document: DocxDocument) -> DocxParserBackend:
+    """
+    Эвристика для DOCX_PARSER=auto: локальный разбор для текстовых документов,
+    unstructured API — для документов с картинками, объектами и надписями.
+    Файлы крупнее DOCX_LOCAL_MAX_BYTES отправляются в API ещё до открытия python-docx.
+    """
+    if document.element.body.xpath(_COMPLEX_CONTENT_XPATH):
+        return "api"
+    return "local"
+
 
-    logger.info("Parsed %d chunks from document (metadata_filename=%s)", len(chunks), metadata_filename)
+def _heading_depth(paragraph: Paragraph) -> int | None:
+    """Уровень заголовка по стилю абзаца (Title — 0, Heading N — N-1) или None."""
+    style_name = (paragraph.style.name if paragraph.style is not None else "") or ""
+    if style_name == "Title":
+        return 0
+    if style_name.startswith("Heading"):
+        level = style_name[len("Heading"):].strip()
+        return int(level) - 1 if level.isdigit() else 0
+    return None
 
-    save_chunks_to_file(chunks)
+
+def _is_list_item(paragraph: Paragraph) -> bool:
+    style_name = (paragraph.style.name if paragraph.style is not None else "") or ""
+    if style_name.startswith("List"):
+        return True
+    p_pr = paragraph._p.pPr
+    return p_pr is not None and p_pr.numPr is not None
+
+
+def _page_breaks(paragraph: Paragraph) -> int:
+    """
+    Число разрывов страниц в абзаце (явные и отрисованные Word).
+    Word пишет lastRenderedPageBreak сразу после явного разрыва — такой
+    отрисованный разрыв не считается повторно.
+    """
+    breaks = 0
+    after_explicit = False
+    for el in paragraph._p.iter():
+        if el.tag == f"{_W_NS}br" and el.get(f"{_W_NS}type") == "page":
+            breaks += 1
+            after_explicit = True
+        elif el.tag == f"{_W_NS}lastRenderedPageBreak":
+            if not after_explicit:
+                breaks += 1
+            after_explicit = False
+        elif el.tag == f"{_W_NS}t" and el.text:
+            after_explicit = False
+    return breaks
+
+
+def _table_to_element(table: DocxTable, metadata_filename: str, page_number: int) -> Table | None:
+    rows = [[cell.text.strip() for cell in row.cells] for row in table.rows]
+    text = "\n".join(" ".join(cell for cell in row if cell) for row in rows).strip()
+    if not text:
+        return None
+
+    html_rows = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(cell)}</td>" for cell in row) + "</tr>" for row in rows
+    )
+    return Table(
+        text=text,
+        metadata=ElementMetadata(
+            filename=metadata_filename,
+            page_number=page_number,
+            text_as_html=f"<table>{html_rows}</table>",
+        ),
+    )
+
+
+def partition_docx_local(document: DocxDocument, metadata_filename: str) -> list[Element]:
+    """
+    Локальный разбор .docx обходом python-docx. Возвращает элементы unstructured
+    тех же категорий, что и API (Title, NarrativeText, ListItem, Table),
+    поэтому дальше они проходят тот же локальный чанкинг.
+    """
+    elements: list[Element] = []
+    page_number = 1
+
+    for child in document.element.body.iterchildren():
+        if child.tag == f"{_W_NS}tbl":
+            table = _table_to_element(DocxTable(child, document), metadata_filename, page_number)
+            if table is not None:
+                elements.append(table)
+            continue
+
+        if child.tag != f"{_W_NS}p":
+            continue
+
+        paragraph = Paragraph(child, document)
+        page_breaks = _page_breaks(paragraph)
+        text = paragraph.text.strip()
+        if text:
+            depth = _heading_depth(paragraph)
+            metadata = ElementMetadata(filename=metadata_filename, page_number=page_number)
+            if depth is not None:
+                metadata.category_depth = depth
+                elements.append(Title(text=text, metadata=metadata))
+            elif _is_list_item(paragraph):
+                elements.append(ListItem(text=text, metadata=metadata))
+            else:
+                elements.append(NarrativeText(text=text, metadata=metadata))
+        page_number += page_breaks
+
+    return elements
+
+
+def partition_docx_stream(
+    file_chunks: Iterable[bytes],
+    metadata_filename: str | None = "uploaded.docx",
+    parser: str | None = None,
+) -> tuple[list[Element], DocxParserBackend]:
+    """
+    Принимает .docx как поток частей (например, MinIO-ответ) и возвращает сырые элементы
+    и использованный бэкенд. Режим выбирается настройкой DOCX_PARSER (auto | local | api).
+    В режиме api файл передаётся в unstructured API потоком; в остальных режимах
+    он сначала складывается во временный файл, нужный python-docx.
+    :param file_chunks: итерируемый источник байтов документа
+    :param metadata_filename: имя файла, которое будет записано в метаданные
+    :param parser: переопределение DOCX_PARSER
+    :return: список элементов unstructured и бэкенд
+    """
+    metadata_filename = metadata_filename or "uploaded.docx"
+    mode = parser or settings.DOCX_PARSER
+
+    try:
+        if mode == "api":
+            backend: DocxParserBackend = "api"
+            elements = partition_stream_via_api(file_chunks, metadata_filename)
+        else:
+            with _spool(file_chunks) as spooled:
+                # Размер проверяется до python-docx: крупный файл не разбирается в lxml ради отправки в API
+                if mode != "local" and _file_size(spooled) > settings.DOCX_LOCAL_MAX_BYTES:
+                    backend = "api"
+                else:
+                    document = docx.Document(spooled)
+                    backend = "local" if mode == "local" else choose_docx_parser(document)
+                if backend == "local":
+                    elements = partition_docx_local(document, metadata_filename)
+                else:
+                    elements = partition_stream_via_api(_iter_file(spooled), metadata_filename)
+    except Exception as e:
+        logger.exception("Error while partitioning document: %s", e)
+        raise e
+
+    logger.info(
+        "Partitioned %d elements from document (metadata_filename=%s, parser=%s)",
+        len(elements), metadata_filename, backend,
+    )
+    return elements, backend
+
+
+def chunk_document_elements(
+    elements: list[Element],
+    params: ChunkingParams | None = None,
+    document_id: uuid.UUID | None = None,
+) -> list[Chunk]:
+    """Чанкинг сырых элементов и преобразование результата в Chunk."""
+    chunks = elements_to_chunks(chunk_elements_locally(elements, params), document_id)
+    logger.info("Chunked %d elements into %d chunks", len(elements), len(chunks))
+
+    if settings.DEBUG_SAVE_CHUNKS:
+        save_chunks_to_file(chunks)
     return chunks
 
 
+def parse_docx_to_chunks(file_bytes: bytes, metadata_filename: str | None = "uploaded.docx") -> list[Chunk]:
+    """
+    Основная функция: принимает байты .docx и возвращает список Chunk.
+    :param file_bytes: байты документа (как из MinIO)
+    :param metadata_filename: имя файла, которое будет записано в метаданные (обязательно при передаче file)
+    :return: список Chunk
+    """
+    if not isinstance(file_bytes, (bytes, bytearray)):
+        raise TypeError("file_bytes должен быть bytes или bytearray")
+
+    elements, _ = partition_docx_stream([bytes(file_bytes)], metadata_filename)
+    return chunk_document_elements(elements)
+
+
 def save_chunks_to_file(chunks: list[Chunk], filename: str = "chunks.txt") -> None:
     """
     Сохраняет все чанки в текстовый файл.
@@ -0,0 +1,135 @@
+"""
+Сравнение локального (python-docx) и API-парсинга .docx: скорость и совпадение чанков —
+текста, заголовков и полей section / page_number / element_type по парам чанков.
+
+Запуск внутри контейнера docs_api:
+    python -m app.documents.parser_report path/to/a.docx path/to/b.docx
+"""
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from unstructured.documents.elements import Element
+
+from app.documents.parser import partition_docx_stream, chunk_document_elements
+from app.documents.schemas import Chunk
+
+
+def _words(chunks: list[Chunk]) -> list[str]:
+    return " ".join(chunk.text for chunk in chunks).split()
+
+
+def _titles(elements: list[Element]) -> set[str]:
+    return {el.text.strip() for el in elements if getattr(el, "category", None) == "Title"}
+
+
+# Поля Chunk, которые локальный парсер должен воспроизводить так же, как API
+PARITY_FIELDS = ("section", "page_number", "element_type")
+
+
+def _chunk_pairs(local_chunks: list[Chunk], api_chunks: list[Chunk]) -> list[tuple[Chunk, Chunk]]:
+    """
+    Сопоставляет чанки двух парсеров: выравнивание последовательностей текстов,
+    совпавшие и заменённые участки сопоставляются по порядку.
+    """
+    local_texts = [" ".join(chunk.text.split()) for chunk in local_chunks]
+    api_texts = [" ".join(chunk.text.split()) for chunk in api_chunks]
+    pairs = []
+    matcher = SequenceMatcher(None, local_texts, api_texts, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag in ("equal", "replace"):
+            pairs.extend(zip(local_chunks[i1:i2], api_chunks[j1:j2]))
+    return pairs
+
+
+def field_parity(local_chunks: list[Chunk], api_chunks: list[Chunk]) -> dict[str, float]:
+    """Доля сопоставленных пар чанков, у которых совпадает каждое из PARITY_FIELDS."""
+    pairs = _chunk_pairs(local_chunks, api_chunks)
+    if not pairs:
+        return {field: 0.0 for field in PARITY_FIELDS}
+    return {
+        field: sum(getattr(local, field) == getattr(api, field) for local, api in pairs) / len(pairs)
+        for field in PARITY_FIELDS
+    }
+
+
+def _run(path: Path, parser: str) -> tuple[list[Element], list[Chunk], float]:
+    data = path.read_bytes()
+    started = time.perf_counter()
+    elements, _ = partition_docx_stream([data], path.name, parser=parser)
+    chunks = chunk_document_elements(elements)
+    return elements, chunks, time.perf_counter() - started
+
+
+def compare_file(path: Path) -> dict:
+    local_elements, local_chunks, local_seconds = _run(path, "local")
+    api_elements, api_chunks, api_seconds = _run(path, "api")
+
+    api_titles = _titles(api_elements)
+    size_kb = path.stat().st_size / 1024
+
+    return {
+        "file": path.name,
+        "size_kb": size_kb,
+        "local_ms": local_seconds * 1000,
+        "api_ms": api_seconds * 1000,
+        "local_kb_s": size_kb / local_seconds if local_seconds else 0.0,
+        "api_kb_s": size_kb / api_seconds if api_seconds else 0.0,
+        "elements": (len(local_elements), len(api_elements)),
+        "chunks": (len(local_chunks), len(api_chunks)),
+        "text_parity": SequenceMatcher(None, _words(local_chunks), _words(api_chunks), autojunk=False).ratio(),
+        "title_parity": len(_titles(local_elements) & api_titles) / len(api_titles) if api_titles else 1.0,
+        "chunk_pairs": len(_chunk_pairs(local_chunks, api_chunks)),
+        "field_parity": field_parity(local_chunks, api_chunks),
+    }
+
+
+def format_report(rows: list[dict]) -> str:
+    header = (
+        f"{'file':<32} {'KB':>8} {'local ms':>9} {'api ms':>9} {'speedup':>8} "
+        f"{'elements l/a':>13} {'chunks l/a':>11} {'text':>6} {'titles':>7} "
+        f"{'pairs':>6} {'section':>8} {'page':>6} {'type':>6}"
+    )
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        speedup = row["api_ms"] / row["local_ms"] if row["local_ms"] else 0.0
+        lines.append(
+            f"{row['file'][:32]:<32} {row['size_kb']:>8.1f} {row['local_ms']:>9.1f} {row['api_ms']:>9.1f} "
+            f"{speedup:>7.1f}x {'%d/%d' % row['elements']:>13} {'%d/%d' % row['chunks']:>11} "
+            f"{row['text_parity']:>6.1%} {row['title_parity']:>7.1%} "
+            f"{row['chunk_pairs']:>6} {row['field_parity']['section']:>8.1%} "
+            f"{row['field_parity']['page_number']:>6.1%} {row['field_parity']['element_type']:>6.1%}"
+        )
+
+    if rows:
+        total_kb = sum(row["size_kb"] for row in rows)
+        local_s = sum(row["local_ms"] for row in rows) / 1000
+        api_s = sum(row["api_ms"] for row in rows) / 1000
+        lines.append("-" * len(header))
+        lines.append(
+            f"Пропускная способность: local {total_kb / local_s:.1f} KB/s, api {total_kb / api_s:.1f} KB/s; "
+            f"средняя близость текста {sum(row['text_parity'] for row in rows) / len(rows):.1%}"
+        )
+        pairs = sum(row["chunk_pairs"] for row in rows)
+        if pairs:
+            # Средние по всем парам чанков, а не по файлам
+            parity = ", ".join(
+                f"{field} {sum(row['field_parity'][field] * row['chunk_pairs'] for row in rows) / pairs:.1%}"
+                for field in PARITY_FIELDS
+            )
+            lines.append(f"Совпадение полей по {pairs} парам чанков: {parity}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str]) -> int:
+    if not argv:
+        print(__doc__)
+        return 1
+    rows = [compare_file(Path(arg)) for arg in argv]
+    print(format_report(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
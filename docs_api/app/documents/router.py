@@ -1,34 +1,94 @@
-from fastapi import APIRouter, Depends, status
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
-from app.documents.schemas import DocumentIngestionRequest, CollectionListResponse
-from app.documents.service import ingest_document, delete_collection, get_list_collections
+from app.documents.schemas import DocumentIngestionRequest, DocumentRechunkRequest, CollectionListResponse, IngestionJob
+from app.documents.service import submit_ingestion, delete_collection, get_list_collections, export_collection
+from app.documents.jobs import IngestionJobManager
 from app.dependencies.minio import get_minio_client, MinioClient
 from app.dependencies.chromadb_manager import get_chromadb_manager, ChromaDBManager
+from app.dependencies.bm25_cache import get_bm25_cache, BM25IndexCache
+from app.dependencies.ingestion_jobs import get_ingestion_jobs
+from app.dependencies.parse_workers import get_parse_workers, ParseWorkerPool
 
 
 router = APIRouter()
 
 
-@router.post("/ingest", status_code=status.HTTP_200_OK)
+@router.post("/ingest", status_code=status.HTTP_202_ACCEPTED, response_model=IngestionJob)
 async def ingest(
     request: DocumentIngestionRequest,
+    ingestion_jobs: IngestionJobManager = Depends(get_ingestion_jobs),
     minio_client: MinioClient = Depends(get_minio_client),
-    chromadb_manager: ChromaDBManager = Depends(get_chromadb_manager)
-):
-    await ingest_document(
+    chromadb_manager: ChromaDBManager = Depends(get_chromadb_manager),
+    bm25_cache: BM25IndexCache = Depends(get_bm25_cache),
+    parse_workers: ParseWorkerPool = Depends(get_parse_workers),
+) -> IngestionJob:
+    return submit_ingestion(
+        request=request,
+        ingestion_jobs=ingestion_jobs,
+        minio_client=minio_client,
+        chromadb_manager=chromadb_manager,
+        bm25_cache=bm25_cache,
+        parse_workers=parse_workers,
+    )
+
+
+@router.post("/rechunk", status_code=status.HTTP_202_ACCEPTED, response_model=IngestionJob)
+async def rechunk(
+    request: DocumentRechunkRequest,
+    ingestion_jobs: IngestionJobManager = Depends(get_ingestion_jobs),
+    minio_client: MinioClient = Depends(get_minio_client),
+    chromadb_manager: ChromaDBManager = Depends(get_chromadb_manager),
+    bm25_cache: BM25IndexCache = Depends(get_bm25_cache),
+    parse_workers: ParseWorkerPool = Depends(get_parse_workers),
+) -> IngestionJob:
+    """
+    Перечанкивает и переиндексирует коллекцию документа. Сырые элементы берутся
+    из кэша парсинга, так что стоимость — только эмбеддинг новых чанков.
+    Без параметров chunking используются текущие настройки.
+    """
+    return submit_ingestion(
         request=request,
+        ingestion_jobs=ingestion_jobs,
         minio_client=minio_client,
         chromadb_manager=chromadb_manager,
+        bm25_cache=bm25_cache,
+        parse_workers=parse_workers,
+        chunking=request.chunking,
+    )
+
+
+@router.get("/jobs/{job_id}", status_code=status.HTTP_200_OK, response_model=IngestionJob)
+async def get_ingestion_job(
+    job_id: uuid.UUID,
+    ingestion_jobs: IngestionJobManager = Depends(get_ingestion_jobs),
+) -> IngestionJob:
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Задача индексации не найдена")
+    return job
+
+
+@router.get("/{document_id}/export", status_code=status.HTTP_200_OK)
+async def export(
+    document_id: str,
+    chromadb_manager: ChromaDBManager = Depends(get_chromadb_manager),
+) -> StreamingResponse:
+    return StreamingResponse(
+        await export_collection(document_id, chromadb_manager),
+        media_type="application/x-ndjson",
     )
-    return {"detail": "Document successfully ingested"}
 
 
 @router.delete("/{document_id}", status_code=status.HTTP_200_OK)
 async def delete(
     document_id: str,
-    chromadb_manager: ChromaDBManager = Depends(get_chromadb_manager)
+    chromadb_manager: ChromaDBManager = Depends(get_chromadb_manager),
+    bm25_cache: BM25IndexCache = Depends(get_bm25_cache),
+    ingestion_jobs: IngestionJobManager = Depends(get_ingestion_jobs),
 ):
-    await delete_collection(document_id, chromadb_manager)
+    await delete_collection(document_id, chromadb_manager, bm25_cache, ingestion_jobs)
     return {"detail": f"Collection {document_id} successfully deleted"}
 
 
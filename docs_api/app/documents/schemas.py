@@ -1,6 +1,9 @@
+import hashlib
 import uuid
-from typing import Any
-from pydantic import BaseModel
+from datetime import datetime
+from enum import Enum
+from typing import Any, Literal
+from pydantic import BaseModel, Field
 
 
 class DocumentIngestionRequest(BaseModel):
@@ -9,6 +12,36 @@ class DocumentIngestionRequest(BaseModel):
     original_filename: str
 
 
+class ChunkingParams(BaseModel):
+    chunking_strategy: Literal["by_title", "basic"]
+    max_characters: int = Field(..., gt=0)
+    new_after_n_chars: int = Field(..., gt=0)
+    combine_under_n_chars: int = Field(..., ge=0)
+
+
+class DocumentRechunkRequest(DocumentIngestionRequest):
+    chunking: ChunkingParams | None = None
+
+
+class IngestionJobStatus(str, Enum):
+    queued = "queued"
+    parsing = "parsing"
+    embedding = "embedding"
+    done = "done"
+    failed = "failed"
+
+
+class IngestionJob(BaseModel):
+    job_id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    document_id: uuid.UUID
+    status: IngestionJobStatus = IngestionJobStatus.queued
+    chunk_count: int | None = None
+    timings: dict[str, float] = Field(default_factory=dict)
+    error: str | None = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    finished_at: datetime | None = None
+
+
 class CollectionListResponse(BaseModel):
     collections: list[str]
 
@@ -25,3 +58,9 @@ class Chunk(BaseModel):
     @staticmethod
     def create_id() -> str:
         return str(uuid.uuid4())
+
+    @staticmethod
+    def content_id(document_id: uuid.UUID, index: int, text: str) -> str:
+        """Детерминированный ID: тот же документ, позиция и текст дают тот же ID при повторной индексации."""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return str(uuid.uuid5(document_id, f"{index}:{text_hash}"))
@@ -1,58 +1,191 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import AsyncIterator
+
 from fastapi import HTTPException
 
-from app.documents.schemas import DocumentIngestionRequest
-from app.documents.parser import parse_docx_to_chunks
+from app.documents.schemas import DocumentIngestionRequest, IngestionJob, IngestionJobStatus, ChunkingParams
+from app.documents.parse_cache import ParseCache
+from app.documents.workers import ParseWorkerPool, parse_document_task, chunk_elements_task
+from app.documents.jobs import IngestionJobManager
 from app.clients.minio_client import MinioClient
 from app.clients.chromadb_client import ChromaDBManager
+from app.rag.bm25_cache import BM25IndexCache
+from app.config import settings
 from app.logger import logger
 
 
-async def ingest_document(
+def submit_ingestion(
     request: DocumentIngestionRequest,
+    ingestion_jobs: IngestionJobManager,
     minio_client: MinioClient,
     chromadb_manager: ChromaDBManager,
-):
-    logger.info(f"Начинаем обработку документа: {request.original_filename}")
+    bm25_cache: BM25IndexCache,
+    parse_workers: ParseWorkerPool,
+    chunking: ChunkingParams | None = None,
+) -> IngestionJob:
+    """Ставит индексацию документа в фоновую очередь и сразу возвращает задачу."""
+    return ingestion_jobs.submit(
+        request.document_id,
+        lambda job: ingest_document(
+            request=request,
+            job=job,
+            minio_client=minio_client,
+            chromadb_manager=chromadb_manager,
+            bm25_cache=bm25_cache,
+            parse_workers=parse_workers,
+            chunking=chunking,
+        ),
+    )
 
-    try:
-        document_bytes = minio_client.get_document(request.storage_key)
-    except Exception as e:
-        logger.error(f"Ошибка загрузки файла из MinIO: {e}")
-        raise
 
+async def _load_elements(
+    request: DocumentIngestionRequest,
+    job: IngestionJob,
+    minio_client: MinioClient,
+    parse_workers: ParseWorkerPool,
+) -> list[dict]:
+    """
+    Возвращает сырые элементы документа (в формате elements_to_dicts): из кэша
+    парсинга, если он есть, иначе парсингом в пуле процессов с сохранением в кэш.
+    """
+    parse_cache = ParseCache(minio_client) if settings.PARSE_CACHE_ENABLED else None
+    file_sha256 = None
+
+    if parse_cache is not None:
+        started = time.perf_counter()
+        try:
+            file_sha256 = await asyncio.to_thread(minio_client.document_sha256, request.storage_key)
+            elements = await asyncio.to_thread(parse_cache.get, file_sha256)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки файла из MinIO: {e}")
+            raise
+        job.timings["cache_lookup"] = time.perf_counter() - started
+        if elements is not None:
+            logger.info(f"Документ {request.document_id}: {len(elements)} элементов взято из кэша парсинга")
+            return elements
+
+    started = time.perf_counter()
     try:
-        chunks = parse_docx_to_chunks(document_bytes)
-        logger.info(f"Документ {request.document_id} разбит на {len(chunks)} чанков")
+        # Рабочий процесс сам читает документ из MinIO потоком
+        elements, backend, cpu_seconds = await parse_workers.run(
+            "parse", parse_document_task, request.storage_key, request.original_filename
+        )
     except Exception as e:
-        logger.error(f"Ошибка парсинга: {e}")
+        logger.error(f"Ошибка загрузки или парсинга документа: {e}")
         raise
+    job.timings[f"parse_{backend}"] = time.perf_counter() - started
+    job.timings["parse_cpu"] = cpu_seconds
+
+    if parse_cache is not None:
+        await asyncio.to_thread(parse_cache.put, file_sha256, elements)
+    return elements
 
+
+async def ingest_document(
+    request: DocumentIngestionRequest,
+    job: IngestionJob,
+    minio_client: MinioClient,
+    chromadb_manager: ChromaDBManager,
+    bm25_cache: BM25IndexCache,
+    parse_workers: ParseWorkerPool,
+    chunking: ChunkingParams | None = None,
+):
+    """
+    Индексирует документ. Чанки прошлой индексации удаляются после записи новых,
+    поэтому повторный вызов (например, с другими параметрами чанкинга)
+    переиндексирует коллекцию, не оставляя её пустой на время эмбеддинга.
+    """
+    logger.info(f"Начинаем обработку документа: {request.original_filename}")
+    collection_name = str(request.document_id)
+
+    job.status = IngestionJobStatus.parsing
+    elements = await _load_elements(request, job, minio_client, parse_workers)
+
+    started = time.perf_counter()
+    chunks, cpu_seconds = await parse_workers.run(
+        "chunk", chunk_elements_task, elements, chunking.model_dump() if chunking else None, request.document_id
+    )
+    job.timings["chunk"] = time.perf_counter() - started
+    job.timings["chunk_cpu"] = cpu_seconds
+    job.chunk_count = len(chunks)
+    logger.info(f"Документ {request.document_id} разбит на {len(chunks)} чанков")
+
+    job.status = IngestionJobStatus.embedding
+    started = time.perf_counter()
     try:
-        chromadb_manager.add_chunks(
-            collection_name=str(request.document_id),
+        # Ошибка чтения старых IDs прерывает индексацию: иначе старые чанки не удалятся и задвоятся
+        previous_ids = [chunk_id async for chunk_id in chromadb_manager.iter_chunk_ids(collection_name)]
+        await chromadb_manager.add_chunks(
+            collection_name=collection_name,
             chunks=chunks,
         )
+        # IDs детерминированы: чанки, совпавшие с прошлой индексацией, перезаписаны и остаются
+        new_ids = set(chunks.ids())
+        stale_ids = [chunk_id for chunk_id in previous_ids if chunk_id not in new_ids]
+        if stale_ids:
+            await chromadb_manager.delete_chunks(collection_name, stale_ids)
         logger.info(f"Коллекция {request.document_id} успешно создана")
     except Exception as e:
         logger.error(f"Ошибка загрузки чанков в ChromaDB: {e}")
         raise
+    finally:
+        bm25_cache.invalidate(collection_name)
+    job.timings["embed"] = time.perf_counter() - started
 
-    logger.info(f'Коллекции: {chromadb_manager._client.list_collections()}')
 
-
-async def delete_collection(document_id: str, chromadb_manager: ChromaDBManager):
+async def delete_collection(
+    document_id: str,
+    chromadb_manager: ChromaDBManager,
+    bm25_cache: BM25IndexCache,
+    ingestion_jobs: IngestionJobManager,
+):
+    """
+    Удаляет коллекцию документа. Задачи индексации этого документа отменяются,
+    а само удаление идёт под их блокировкой — иначе запись чанков выполняющейся
+    задачи создала бы удалённую коллекцию заново.
+    """
     logger.info(f"Удаление коллекции {document_id} из ChromaDB")
 
+    async def delete() -> None:
+        try:
+            await chromadb_manager.delete_collection(document_id)
+        except Exception as e:
+            logger.error(f"Ошибка удаления коллекции {document_id}: {e}")
+            raise
+        finally:
+            bm25_cache.invalidate(document_id)
+
     try:
-        chromadb_manager.delete_collection(document_id)
-    except Exception as e:
-        logger.error(f"Ошибка удаления коллекции {document_id}: {e}")
-        raise
+        job_document_id = uuid.UUID(document_id)
+    except ValueError:
+        # Не ID документа — задач индексации для такой коллекции быть не может
+        await delete()
+        return
+    await ingestion_jobs.run_exclusive(job_document_id, delete)
 
 
 async def get_list_collections(chromadb_manager: ChromaDBManager) -> list[str]:
     try:
-        collections = chromadb_manager.get_list_collections()
+        collections = await chromadb_manager.get_list_collections()
         return collections
     except Exception as e:
         raise HTTPException(status_code=500, detail="Ошибка при получении списка коллекций")
+
+
+async def export_collection(document_id: str, chromadb_manager: ChromaDBManager) -> AsyncIterator[bytes]:
+    """
+    Выгружает чанки коллекции в NDJSON, читая коллекцию постранично.
+    Наличие коллекции проверяется до начала ответа, чтобы вернуть 404, а не пустой поток.
+    """
+    if not await chromadb_manager.collection_exists(document_id):
+        raise HTTPException(status_code=404, detail="Коллекция не найдена")
+    return _export_records(document_id, chromadb_manager)
+
+
+async def _export_records(document_id: str, chromadb_manager: ChromaDBManager) -> AsyncIterator[bytes]:
+    async for chunk in chromadb_manager.iter_chunks(document_id):
+        record = {"id": chunk.id, "text": chunk.text, "metadata": chunk.metadata}
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
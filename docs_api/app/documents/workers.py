@@ -0,0 +1,123 @@
+import asyncio
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from unstructured.staging.base import elements_from_dicts, elements_to_dicts
+
+from app.documents.parser import partition_docx_stream, chunk_document_elements
+from app.documents.schemas import ChunkingParams
+from app.documents.chunk_table import ChunkTable
+from app.clients.minio_client import MinioClient
+from app.logger import logger
+
+
+# Клиент MinIO рабочего процесса: создаётся при первой задаче и живёт вместе с процессом
+_worker_minio_client: MinioClient | None = None
+
+
+def _get_worker_minio_client() -> MinioClient:
+    global _worker_minio_client
+    if _worker_minio_client is None:
+        _worker_minio_client = MinioClient()
+    return _worker_minio_client
+
+
+def parse_document_task(storage_key: str, metadata_filename: str | None = None) -> tuple[list[dict], str, float]:
+    """
+    Задача пула: потоково читает документ из MinIO и разбивает его на элементы.
+    Возвращает (элементы в виде dict, бэкенд парсинга, CPU-время процесса).
+    """
+    started = time.process_time()
+    elements, backend = partition_docx_stream(
+        _get_worker_minio_client().iter_document(storage_key),
+        metadata_filename,
+    )
+    return elements_to_dicts(elements), backend, time.process_time() - started
+
+
+def chunk_elements_task(
+    element_dicts: list[dict],
+    chunking: dict | None = None,
+    document_id: uuid.UUID | None = None,
+) -> tuple[ChunkTable, float]:
+    """
+    Задача пула: чанкинг сырых элементов и построение чанков
+    (с детерминированными IDs, если передан document_id).
+    Возвращает (компактную ChunkTable, CPU-время процесса).
+    """
+    started = time.process_time()
+    params = ChunkingParams(**chunking) if chunking else None
+    chunks = chunk_document_elements(elements_from_dicts(element_dicts), params, document_id)
+    return ChunkTable.from_chunks(chunks), time.process_time() - started
+
+
+class _StageStats:
+    def __init__(self):
+        self.tasks = 0
+        self.errors = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "tasks": self.tasks,
+            "errors": self.errors,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+        }
+
+
+class ParseWorkerPool:
+    """
+    Пул процессов для CPU-ёмких стадий индексации (парсинг и чанкинг),
+    чтобы массовая загрузка использовала несколько ядер и не занимала
+    поток цикла событий. При max_workers=0 задачи выполняются в потоках
+    текущего процесса.
+
+    Задачи пула возвращают кортеж, последний элемент которого — CPU-время,
+    измеренное внутри рабочего процесса; по нему собирается статистика стадий.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+        if max_workers > 0:
+            # spawn: fork процесса с работающим циклом событий и потоками небезопасен
+            self._executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        self._stats: dict[str, _StageStats] = {}
+
+    async def run(self, stage: str, func: Callable[..., tuple], *args: Any) -> tuple:
+        stats = self._stats.setdefault(stage, _StageStats())
+        started = time.perf_counter()
+        try:
+            if self._executor is None:
+                result = await asyncio.to_thread(func, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, func, *args)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.tasks += 1
+            stats.wall_seconds += time.perf_counter() - started
+
+        stats.cpu_seconds += result[-1]
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "stages": {name: stats.snapshot() for name, stats in self._stats.items()},
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Пул процессов парсинга остановлен")
@@ -4,7 +4,7 @@ from contextlib import asynccontextmanager
 from fastapi.responses import JSONResponse
 
 from app.routers import include_routers
-from app.clients.langfuse_client import LangfuseClient
+from app.resources import AppResources
 
 
 # Фильтр для скрытия логов от healthcheck
@@ -19,13 +19,15 @@ logging.getLogger("uvicorn.access").addFilter(HealthcheckFilter())
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    langfuse = LangfuseClient().get_client()
+    # langfuse = LangfuseClient().get_client()
+    app.state.resources = AppResources()
     yield
+    await app.state.resources.aclose()
 
 
 app = FastAPI(
     title="DOCS-API",
-    # lifespan=lifespan
+    lifespan=lifespan
 )
 
 # Подключаем все роутеры
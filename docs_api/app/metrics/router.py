@@ -0,0 +1,46 @@
+import asyncio
+
+from fastapi import APIRouter, Depends
+
+from app.metrics.schemas import BM25CacheStats, EmbeddingCacheStats, EmbeddingStoreStats, EmbeddingBatchStats, ParseWorkerStats
+from app.dependencies.bm25_cache import get_bm25_cache, BM25IndexCache
+from app.dependencies.resources import get_resources, AppResources
+
+
+router = APIRouter()
+
+
+@router.get("/bm25", response_model=BM25CacheStats)
+async def bm25_cache_stats(
+    bm25_cache: BM25IndexCache = Depends(get_bm25_cache),
+) -> BM25CacheStats:
+    return BM25CacheStats(**bm25_cache.stats())
+
+
+@router.get("/embeddings", response_model=EmbeddingCacheStats)
+async def embedding_cache_stats(
+    resources: AppResources = Depends(get_resources),
+) -> EmbeddingCacheStats:
+    return EmbeddingCacheStats(**resources.embeddings.stats())
+
+
+@router.get("/embedding_store", response_model=EmbeddingStoreStats)
+async def embedding_store_stats(
+    resources: AppResources = Depends(get_resources),
+) -> EmbeddingStoreStats:
+    stats = await asyncio.to_thread(resources.embedding_store.stats)
+    return EmbeddingStoreStats(**stats)
+
+
+@router.get("/embedding_batches", response_model=EmbeddingBatchStats)
+async def embedding_batch_stats(
+    resources: AppResources = Depends(get_resources),
+) -> EmbeddingBatchStats:
+    return EmbeddingBatchStats(**resources.embedding_client.batch_stats())
+
+
+@router.get("/parse_workers", response_model=ParseWorkerStats)
+async def parse_worker_stats(
+    resources: AppResources = Depends(get_resources),
+) -> ParseWorkerStats:
+    return ParseWorkerStats(**resources.parse_workers.stats())
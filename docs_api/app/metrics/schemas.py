@@ -0,0 +1,57 @@
+from pydantic import BaseModel
+
+
+class BM25CacheStats(BaseModel):
+    collections: int
+    chunks: int
+    max_collections: int
+    max_chunks: int
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    invalidations: int
+
+
+class EmbeddingCacheStats(BaseModel):
+    model_name: str
+    size: int
+    max_size: int
+    ttl_seconds: int
+    redis_enabled: bool
+    memory_hits: int
+    redis_hits: int
+    misses: int
+    hit_rate: float
+    redis_errors: int
+
+
+class EmbeddingStoreStats(BaseModel):
+    model_name: str
+    stored: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class EmbeddingBatchStats(BaseModel):
+    model_name: str
+    batch_size: int
+    max_concurrency: int
+    batches: int
+    texts: int
+    avg_batch_seconds: float
+    max_batch_seconds: float
+    last_batch_seconds: float
+
+
+class ParseStageStats(BaseModel):
+    tasks: int
+    errors: int
+    wall_seconds: float
+    cpu_seconds: float
+
+
+class ParseWorkerStats(BaseModel):
+    max_workers: int
+    stages: dict[str, ParseStageStats]
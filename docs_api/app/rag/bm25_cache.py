@@ -0,0 +1,134 @@
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from langchain_core.retrievers import BaseRetriever
+
+from app.logger import logger
+
+
+class BM25IndexCache:
+    """
+    Процессный LRU-кэш BM25-индексов, ключ — имя коллекции.
+
+    Индекс строится один раз при первом вопросе к коллекции и переиспользуется
+    до инвалидации (загрузка/удаление документа) или вытеснения по лимитам:
+    max_collections — число закэшированных коллекций,
+    max_chunks — суммарное число чанков во всех индексах.
+    Параллельные запросы к одной коллекции ждут одно построение индекса.
+    """
+
+    def __init__(self, max_collections: int, max_chunks: int):
+        self.max_collections = max_collections
+        self.max_chunks = max_chunks
+
+        self._indexes: OrderedDict[str, tuple[BaseRetriever, int]] = OrderedDict()
+        # Поколение коллекции и число идущих построений её индекса;
+        # запись удаляется вместе с последним построением
+        self._generations: dict[str, tuple[int, int]] = {}
+        self._total_chunks = 0
+        self._build_locks: dict[str, asyncio.Lock] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get_or_build(
+        self,
+        collection_name: str,
+        build: Callable[[], Awaitable[tuple[BaseRetriever, int] | None]],
+    ) -> BaseRetriever | None:
+        """
+        Возвращает индекс из кэша или строит его через build().
+        build возвращает (retriever, число чанков) или None для пустой коллекции.
+        """
+        cached = self._lookup(collection_name)
+        if cached is not None:
+            return cached
+
+        lock = self._build_locks.setdefault(collection_name, asyncio.Lock())
+        async with lock:
+            # Индекс мог построить конкурентный запрос, пока мы ждали блокировку
+            cached = self._lookup(collection_name)
+            if cached is not None:
+                return cached
+
+            self.misses += 1
+            generation, builds = self._generations.get(collection_name, (0, 0))
+            self._generations[collection_name] = (generation, builds + 1)
+            try:
+                built = await build()
+            finally:
+                current, builds = self._generations[collection_name]
+                if builds == 1:
+                    del self._generations[collection_name]
+                else:
+                    self._generations[collection_name] = (current, builds - 1)
+            if built is None:
+                return None
+
+            retriever, size = built
+            # Коллекцию изменили, пока строился индекс — не кладём устаревшие данные
+            if current != generation:
+                logger.info(f"BM25-индекс '{collection_name}' устарел во время построения, в кэш не сохранён")
+                return retriever
+
+            self._store(collection_name, retriever, size)
+            return retriever
+
+    def invalidate(self, collection_name: str) -> None:
+        if collection_name in self._generations:
+            generation, builds = self._generations[collection_name]
+            self._generations[collection_name] = (generation + 1, builds)
+        lock = self._build_locks.get(collection_name)
+        if lock is not None and not lock.locked():
+            del self._build_locks[collection_name]
+
+        cached = self._indexes.pop(collection_name, None)
+        if cached is not None:
+            self._total_chunks -= cached[1]
+            self.invalidations += 1
+            logger.info(f"BM25-индекс коллекции '{collection_name}' инвалидирован")
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "collections": len(self._indexes),
+            "chunks": self._total_chunks,
+            "max_collections": self.max_collections,
+            "max_chunks": self.max_chunks,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _lookup(self, collection_name: str) -> BaseRetriever | None:
+        cached = self._indexes.get(collection_name)
+        if cached is None:
+            return None
+        self._indexes.move_to_end(collection_name)
+        self.hits += 1
+        return cached[0]
+
+    def _store(self, collection_name: str, retriever: BaseRetriever, size: int) -> None:
+        if size > self.max_chunks:
+            logger.warning(
+                f"BM25-индекс '{collection_name}' ({size} чанков) больше лимита кэша ({self.max_chunks}), не кэшируется"
+            )
+            return
+
+        previous = self._indexes.pop(collection_name, None)
+        if previous is not None:
+            self._total_chunks -= previous[1]
+
+        self._indexes[collection_name] = (retriever, size)
+        self._total_chunks += size
+
+        while len(self._indexes) > self.max_collections or self._total_chunks > self.max_chunks:
+            evicted_name, (_, evicted_size) = self._indexes.popitem(last=False)
+            self._total_chunks -= evicted_size
+            self.evictions += 1
+            logger.info(f"BM25-индекс '{evicted_name}' вытеснен из кэша")
@@ -0,0 +1,47 @@
+from typing import Any
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+from rank_bm25 import BM25Okapi
+
+from app.documents.chunk_table import ChunkTable
+
+
+class ChunkTableBM25Retriever(BaseRetriever):
+    """
+    BM25-ретривер поверх ChunkTable. В отличие от BM25Retriever из langchain
+    не держит список Document на каждый чанк: Document создаётся только
+    для k найденных чанков. Токенизация совпадает с BM25Retriever (split по пробелам).
+    Сам индекс BM25Okapi по-прежнему хранит словарь частот термов (doc_freqs)
+    на каждый чанк — это основная часть памяти кэша; ChunkTable экономит
+    только на текстах и метаданных.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    table: ChunkTable
+    vectorizer: Any
+    collection_name: str
+    k: int = 2
+
+    @classmethod
+    def from_table(cls, table: ChunkTable, collection_name: str, k: int = 2) -> "ChunkTableBM25Retriever":
+        # Корпус токенизируется генератором, список токенов всех чанков не строится
+        vectorizer = BM25Okapi(table.text(i).split() for i in range(len(table)))
+        return cls(table=table, vectorizer=vectorizer, collection_name=collection_name, k=k)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        scores = self.vectorizer.get_scores(query.split())
+        top = np.argsort(scores)[::-1][:self.k]
+        return [
+            Document(
+                page_content=self.table.text(i),
+                metadata=self.table.metadata(i) | {"id": self.table.id(i), "collection": self.collection_name},
+            )
+            for i in map(int, top)
+        ]
@@ -1,11 +1,18 @@
+import asyncio
+from typing import AsyncIterator
+
 from langchain.chains import RetrievalQA
 from langchain.retrievers import EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
+from langchain_core.retrievers import BaseRetriever
 from langfuse.langchain import CallbackHandler
 
 from app.clients.openai_api_client import CustomLLM
 from app.clients.chromadb_client import ChromaDBManager
 from app.clients.langfuse_client import LangfuseClient
+from app.rag.bm25_cache import BM25IndexCache
+from app.rag.bm25_retriever import ChunkTableBM25Retriever
+from app.documents.chunk_table import ChunkTable
+from app.documents.metadata_schema import project_metadata
 from app.rag.qa_prompt import qa_prompt
 from app.logger import logger
 
@@ -14,36 +21,49 @@ from app.logger import logger
 # langfuse_handler = CallbackHandler()
 
 
-def get_answer(question: str, collection_name: str) -> str:
-    chroma_manager = ChromaDBManager()
-    vectorstore = chroma_manager.get_vectorstore(collection_name=collection_name)
+async def _build_bm25_retriever(
+    chroma_manager: ChromaDBManager,
+    collection_name: str,
+) -> tuple[ChunkTableBM25Retriever, int] | None:
+    # Коллекция читается постранично прямо в компактную ChunkTable:
+    # без одного огромного ответа Chroma и объектов на каждый чанк
+    table = ChunkTable()
+    async for chunk in chroma_manager.iter_chunks(collection_name):
+        # Проекция на чтении: коллекции, записанные до схемы, не раздувают кэш BM25
+        table.append(chunk.id, chunk.text, project_metadata(chunk.metadata))
 
-    all_texts = chroma_manager.get_all_texts(collection_name=collection_name)
+    if not len(table):
+        return None
 
-    chroma_retriever = vectorstore.as_retriever(search_kwargs={"k": 3}, search_type="similarity")
-    
-    bm25_retriever = BM25Retriever.from_texts(
-        texts=[d["text"] for d in all_texts],
-        metadatas=[d["metadata"] | {"id": d["id"], "collection": d["collection"]} for d in all_texts],
-        k=2
+    # Токенизация корпуса — CPU-работа, выносим из event loop
+    bm25_retriever = await asyncio.to_thread(
+        ChunkTableBM25Retriever.from_table,
+        table,
+        collection_name,
+        k=2,
     )
+    logger.info(f"Построен BM25-индекс для коллекции '{collection_name}': {len(table)} чанков")
+    return bm25_retriever, len(table)
 
-    ensemble_retriever = EnsembleRetriever(retrievers=[chroma_retriever, bm25_retriever])
 
-    qa_chain = RetrievalQA.from_chain_type(
-        llm=CustomLLM(),
-        retriever=ensemble_retriever,
-        chain_type="stuff",
-        return_source_documents=True,
-        chain_type_kwargs={"prompt": qa_prompt}
-    )
+async def _get_retriever(
+    chroma_manager: ChromaDBManager,
+    collection_name: str,
+    bm25_cache: BM25IndexCache,
+) -> BaseRetriever:
+    chroma_retriever = chroma_manager.as_retriever(collection_name=collection_name, k=3)
 
-    response = qa_chain.invoke(
-        {"query": question},
-        # config={"callbacks": [langfuse_handler]}
+    bm25_retriever = await bm25_cache.get_or_build(
+        collection_name,
+        lambda: _build_bm25_retriever(chroma_manager, collection_name),
     )
 
-    source_docs = response.get("source_documents", [])
+    if bm25_retriever is not None:
+        return EnsembleRetriever(retrievers=[chroma_retriever, bm25_retriever])
+    return chroma_retriever
+
+
+def _log_source_documents(source_docs: list) -> None:
     if source_docs:
         for idx, doc in enumerate(source_docs, 1):
             metadata = doc.metadata if hasattr(doc, "metadata") else {}
@@ -53,5 +73,54 @@ def get_answer(question: str, collection_name: str) -> str:
     else:
         logger.info("RAG не нашел релевантных документов для вопроса.")
 
+
+async def get_answer(
+    question: str,
+    collection_name: str,
+    chroma_manager: ChromaDBManager,
+    llm: CustomLLM,
+    bm25_cache: BM25IndexCache,
+) -> str:
+    retriever = await _get_retriever(chroma_manager, collection_name, bm25_cache)
+
+    qa_chain = RetrievalQA.from_chain_type(
+        llm=llm,
+        retriever=retriever,
+        chain_type="stuff",
+        return_source_documents=True,
+        chain_type_kwargs={"prompt": qa_prompt}
+    )
+
+    response = await qa_chain.ainvoke(
+        {"query": question},
+        # config={"callbacks": [langfuse_handler]}
+    )
+
+    _log_source_documents(response.get("source_documents", []))
+
     return response["result"]
 
+
+async def stream_answer(
+    question: str,
+    collection_name: str,
+    chroma_manager: ChromaDBManager,
+    llm: CustomLLM,
+    bm25_cache: BM25IndexCache,
+) -> AsyncIterator[str]:
+    """
+    Потоковый вариант get_answer: тот же ретривер и промпт ("stuff"),
+    но ответ модели отдаётся текстовыми дельтами по мере генерации.
+    """
+    retriever = await _get_retriever(chroma_manager, collection_name, bm25_cache)
+
+    source_docs = await retriever.ainvoke(question)
+    _log_source_documents(source_docs)
+
+    prompt = qa_prompt.format(
+        context="\n\n".join(doc.page_content for doc in source_docs),
+        question=question,
+    )
+
+    async for delta in llm.astream_response_from_server(prompt):
+        yield delta
@@ -1,13 +1,66 @@
-from fastapi import APIRouter
+from typing import AsyncIterator
 
-from app.rag.qa_service import get_answer
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from app.rag.qa_service import get_answer, stream_answer
 from app.rag.schemas import QARequest, QAResponse
+from app.dependencies.bm25_cache import get_bm25_cache, BM25IndexCache
+from app.dependencies.chromadb_manager import get_chromadb_manager, ChromaDBManager
+from app.dependencies.llm import get_llm, CustomLLM
+from app.sse import sse_event
+from app.logger import logger
 
 
 router = APIRouter()
 
 
 @router.post("/get_answer", response_model=QAResponse)
-async def answer_endpoint(request: QARequest):
-    answer = get_answer(request.question, request.collection_name)
+async def answer_endpoint(
+    request: QARequest,
+    chromadb_manager: ChromaDBManager = Depends(get_chromadb_manager),
+    llm: CustomLLM = Depends(get_llm),
+    bm25_cache: BM25IndexCache = Depends(get_bm25_cache),
+):
+    answer = await get_answer(
+        question=request.question,
+        collection_name=request.collection_name,
+        chroma_manager=chromadb_manager,
+        llm=llm,
+        bm25_cache=bm25_cache,
+    )
     return QAResponse(answer=answer)
+
+
+@router.post("/get_answer/stream")
+async def answer_stream_endpoint(
+    request: QARequest,
+    chromadb_manager: ChromaDBManager = Depends(get_chromadb_manager),
+    llm: CustomLLM = Depends(get_llm),
+    bm25_cache: BM25IndexCache = Depends(get_bm25_cache),
+):
+    """
+    Server-Sent Events: `data: {"delta": ...}` на каждый фрагмент ответа,
+    в конце `event: done` либо `event: error` при сбое генерации.
+    """
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for delta in stream_answer(
+                question=request.question,
+                collection_name=request.collection_name,
+                chroma_manager=chromadb_manager,
+                llm=llm,
+                bm25_cache=bm25_cache,
+            ):
+                yield sse_event({"delta": delta})
+        except Exception as e:
+            logger.exception(f"Ошибка потоковой генерации ответа: {e}")
+            yield sse_event({"detail": "Ошибка генерации ответа"}, event="error")
+            return
+        yield sse_event({}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
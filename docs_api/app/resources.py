@@ -0,0 +1,48 @@
+from app.config import settings
+from app.logger import logger
+from app.clients.chromadb_client import ChromaDBManager
+from app.clients.openai_api_client import CustomLLM, CustomOllamaEmbeddings
+from app.clients.embedding_cache import CachedEmbeddings
+from app.clients.embedding_store import StoredEmbeddings
+from app.rag.bm25_cache import BM25IndexCache
+from app.documents.jobs import IngestionJobManager
+from app.documents.workers import ParseWorkerPool
+
+
+class AppResources:
+    """
+    Клиенты уровня приложения: создаются один раз в lifespan и переиспользуются
+    всеми запросами, чтобы создание клиентов и TCP/TLS-соединений не попадало
+    в обработку запроса.
+    """
+
+    def __init__(self):
+        self.embedding_client = CustomOllamaEmbeddings()
+        self.embedding_store = StoredEmbeddings(
+            self.embedding_client,
+            model_name=settings.EMBEDDING_MODEL,
+            path=settings.EMBEDDING_STORE_PATH,
+        )
+        self.embeddings = CachedEmbeddings(
+            self.embedding_store,
+            model_name=settings.EMBEDDING_MODEL,
+            max_size=settings.EMBEDDING_CACHE_MAX_SIZE,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+            redis_url=settings.EMBEDDING_CACHE_REDIS_URL,
+        )
+        self.llm = CustomLLM()
+        self.chromadb_manager = ChromaDBManager(embeddings=self.embeddings)
+        self.bm25_cache = BM25IndexCache(
+            max_collections=settings.BM25_CACHE_MAX_COLLECTIONS,
+            max_chunks=settings.BM25_CACHE_MAX_CHUNKS,
+        )
+        self.ingestion_jobs = IngestionJobManager(max_concurrency=settings.INGEST_MAX_CONCURRENCY)
+        self.parse_workers = ParseWorkerPool(max_workers=settings.PARSE_WORKERS)
+
+    async def aclose(self) -> None:
+        await self.ingestion_jobs.aclose()
+        self.parse_workers.shutdown()
+        await self.llm.aclose()
+        await self.embeddings.aclose()
+        await self.chromadb_manager.aclose()
+        logger.info("Клиенты приложения закрыты")
@@ -0,0 +1,7 @@
+import json
+
+
+def sse_event(data: dict, event: str | None = None) -> str:
+    """Форматирует одно Server-Sent Events сообщение с JSON в поле data."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -1,12 +1,18 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from app.tests.test_service import generate_test_question
 from app.tests.schemas import TestRequest, TestResponse
+from app.dependencies.chromadb_manager import get_chromadb_manager, ChromaDBManager
+from app.dependencies.llm import get_llm, CustomLLM
 
 
 router = APIRouter()
 
 
 @router.post("/get_test", response_model=TestResponse)
-async def get_test(request: TestRequest):
-    return generate_test_question(request)
+async def get_test(
+    request: TestRequest,
+    chromadb_manager: ChromaDBManager = Depends(get_chromadb_manager),
+    llm: CustomLLM = Depends(get_llm),
+):
+    return await generate_test_question(request, chromadb_manager, llm)
@@ -1,4 +1,4 @@
-from random import choice
+from random import randrange
 from pydantic import ValidationError
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import JsonOutputParser
@@ -11,15 +11,17 @@ from app.tests.schemas import TestRequest, TestResponse
 from app.tests.test_prompt import test_prompt
 
 
-def generate_test_question(request: TestRequest) -> TestResponse:
-    chromadb = ChromaDBManager()
-
-    chunk_ids = chromadb.get_chunk_ids_by_collection(request.collection_name)
-    if not chunk_ids:
+async def generate_test_question(
+    request: TestRequest,
+    chromadb: ChromaDBManager,
+    llm: CustomLLM,
+) -> TestResponse:
+    # Случайный чанк выбирается по позиции: список всех IDs не загружается
+    chunk_count = await chromadb.get_collection_length(request.collection_name)
+    if not chunk_count:
         logger.warning(f"Нет чанков в коллекции: {request.collection_name}")
         raise ValueError("Невозможно сгенерировать тест: коллекция пуста.")
 
-    llm = CustomLLM()
     parser = JsonOutputParser()
 
     chain = (
@@ -32,16 +34,17 @@ def generate_test_question(request: TestRequest) -> TestResponse:
     last_error = None
 
     for attempt in range(1, 4):  # до 3 попыток
-        random_chunk_id = choice(chunk_ids)
-        chunk_text = chromadb.get_chunk_by_id(request.collection_name, random_chunk_id)
+        offset = randrange(chunk_count)
+        chunk = await chromadb.get_chunk_at(request.collection_name, offset)
+        chunk_text = chunk.text if chunk else None
 
         if not chunk_text:
-            logger.error(f"[Попытка {attempt}/3] Не удалось получить текст чанка с id={random_chunk_id}")
-            last_error = ValueError(f"Чанк {random_chunk_id} пустой или не найден.")
+            logger.error(f"[Попытка {attempt}/3] Не удалось получить текст чанка на позиции {offset}")
+            last_error = ValueError(f"Чанк на позиции {offset} пустой или не найден.")
             continue
 
         try:
-            result_dict = chain.invoke(chunk_text)
+            result_dict = await chain.ainvoke(chunk_text)
             return TestResponse(**result_dict)
         except ValidationError as ve:
             logger.error(f"[Попытка {attempt}/3] Ошибка валидации TestResponse:")